@@ -13,16 +13,19 @@ class Settings(BaseModel):
     qdrant_port: int = Field(default_factory=lambda: int(os.getenv("QDRANT_PORT", "6333")))
     qdrant_api_key: Optional[str] = Field(default_factory=lambda: os.getenv("QDRANT_API_KEY"))
     qdrant_timeout: float = Field(default_factory=lambda: float(os.getenv("QDRANT_TIMEOUT", "30.0")))
+    qdrant_grpc_port: int = Field(default_factory=lambda: int(os.getenv("QDRANT_GRPC_PORT", "6334")))
     qdrant_prefer_grpc: bool = Field(default_factory=lambda: os.getenv("QDRANT_PREFER_GRPC", "False").upper() == "TRUE")
     qdrant_max_retries: int = Field(default_factory=lambda: int(os.getenv("QDRANT_MAX_RETRIES", "3")))
     qdrant_retry_delay: float = Field(default_factory=lambda: float(os.getenv("QDRANT_RETRY_DELAY", "2.0")))
     qdrant_collection_name: str = Field(default_factory=lambda: os.getenv("QDRANT_COLLECTION_NAME", "templates"))
 
     embedding_dim: int = Field(default_factory=lambda: int(os.getenv("EMBEDDING_DIM", "1536")))
+    embed_concurrency: int = Field(default_factory=lambda: int(os.getenv("EMBED_CONCURRENCY", "8")))
 
     server_host: str = Field(default_factory=lambda: os.getenv("SERVER_HOST", "0.0.0.0"))
     server_port: int = Field(default_factory=lambda: int(os.getenv("SERVER_PORT", "8000")))
     debug: bool = Field(default_factory=lambda: os.getenv("DEBUG", "FALSE").upper() == "TRUE")
+    max_concurrency: int = Field(default_factory=lambda: int(os.getenv("MAX_CONCURRENCY", "4")))
 
     bing_required_policies: List[str] = Field(
         default_factory=lambda: [
@@ -3,7 +3,7 @@ import logging
 
 from langchain_openai import ChatOpenAI
 
-from src.langgraph_agents.state import GraphState, ProcessingStep
+from src.langgraph_agents.state import GraphState, GenerationMetrics, ProcessingStep
 from src.core.html_chunker import HTMLChunker, ChunkProcessingResult
 from src.langgraph_agents.selective_chunk_processor_node import SelectiveChunkProcessor
 from src.langgraph_agents.chunk_processor_node import ChunkProcessor
@@ -21,6 +21,9 @@ class ChunkedModificationNode:
         self.selective_chunk_processor = SelectiveChunkProcessor(chunk_processor=self.chunk_processor)
         self.html_fixer = AdvancedHTMLFixer()
 
+    def close(self) -> None:
+        self.selective_chunk_processor.close()
+
     async def chunked_modification_node(self, state: GraphState) -> Dict[str, Any]:
         logger.info(f"Executing chunked template modification node for {state['brand_name']}")
 
@@ -37,7 +40,7 @@ class ChunkedModificationNode:
                 **state,
                 "final_html": fallback_html,
                 "final_css": fallback_css,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "template_modification", "message": error_msg}
                 ]
             }
@@ -52,7 +55,7 @@ class ChunkedModificationNode:
                 chunks, generated_content, state["spec"], max_retry_attempts=2
             )
             
-            metrics = state.get("metrics", {})
+            metrics = state.setdefault("metrics", GenerationMetrics())
             metrics["chunks_processed"] = len(chunk_results)
             metrics["chunks_failed"] = sum(1 for result in chunk_results if result.errors)
 
@@ -67,7 +70,7 @@ class ChunkedModificationNode:
                     "final_html": original_html,
                     "final_css": original_css,
                     "metrics": metrics,
-                    "messages": state.get("messages", []) + [
+                    "messages": [
                         {"type": "error", "step": "template_modification", "message": error_msg}
                     ]
                 }
@@ -80,7 +83,7 @@ class ChunkedModificationNode:
                 "final_html": fixed_html,
                 "final_css": original_css,
                 "metrics": metrics,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "info", "step": "template_modification", 
                      "message": f"Chunked template modification completed. Processed {metrics['chunks_processed']} chunks, {metrics['chunks_failed']} failed"}
                 ]
@@ -94,7 +97,7 @@ class ChunkedModificationNode:
                 **state,
                 "final_html": original_html,
                 "final_css": original_css,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "template_modification", "message": error_msg}
                 ]
             }
\ No newline at end of file
@@ -147,7 +147,7 @@ class ContentGenerationNode:
             return {
                 **state,
                 "generated_content": self.fallback_content,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "content_generation", "message": error_msg}
                 ]
             }
@@ -195,7 +195,7 @@ class ContentGenerationNode:
             return {
                 **state,
                 "generated_content": generated_content,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "info", "step": "content_generation", "message": "Content generated successfully"}
                 ]
             }
@@ -206,7 +206,7 @@ class ContentGenerationNode:
             return {
                 **state,
                 "generated_content": self.fallback_content,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "content_generation", "message": error_msg}
                 ]
             }
\ No newline at end of file
@@ -8,7 +8,7 @@ from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
-from src.langgraph_agents.state import GraphState, ProcessingStep
+from src.langgraph_agents.state import GraphState, GenerationMetrics, ProcessingStep
 from src.models.pydantic_models import ValidationResult
 from src.utils.logging import get_logger
 
@@ -238,7 +238,7 @@ class HTMLFixingNode:
             return {
                 **state,
                 "final_html": self.html_fixer._create_minimal_valid_html(state["brand_name"]),
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "html_fixing", "message": error_msg}
                 ]
             }
@@ -249,14 +249,14 @@ class HTMLFixingNode:
                 state["brand_name"]
             )
             
-            metrics = state.get("metrics", {})
+            metrics = state.setdefault("metrics", GenerationMetrics())
             metrics["targeted_fixes_applied"] = metrics.get("targeted_fixes_applied", 0) + len(fixes_applied)
 
             return {
                 **state,
                 "final_html": fixed_html,
                 "metrics": metrics,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "info", "step": "html_fixing", "message": f"Applied {len(fixes_applied)} rule-based fixes"}
                 ]
             }
@@ -267,7 +267,7 @@ class HTMLFixingNode:
             return {
                 **state,
                 "final_html": self.html_fixer._create_minimal_valid_html(state["brand_name"]),
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "html_fixing", "message": error_msg}
                 ]
             }
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import Optional, Dict, Any, List
 import logging
 from pydantic import BaseModel, Field
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 import re
 
 from langchain_core.prompts import ChatPromptTemplate
@@ -18,6 +18,8 @@ class HTMLRewriterOutput(BaseModel):
     improvements_made: List[str] = Field(default_factory=list, description="List of improvements applied")
 
 class HTMLRewritingNode:
+    REQUIRED_STRUCTURE_TAGS = frozenset({'html', 'head', 'body', 'title'})
+
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
         self.parser = JsonOutputParser(pydantic_object=HTMLRewriterOutput)
@@ -56,12 +58,13 @@ class HTMLRewritingNode:
         """
 
     def _has_proper_structure(self, soup: BeautifulSoup) -> bool:
-        return (
-            soup.find('html') is not None and
-            soup.find('head') is not None and
-            soup.find('body') is not None and
-            soup.find('title') is not None
-        )
+        missing = set(self.REQUIRED_STRUCTURE_TAGS)
+        for element in soup.descendants:
+            if isinstance(element, Tag) and element.name in missing:
+                missing.discard(element.name)
+                if not missing:
+                    return True
+        return False
 
     def _format_with_beautifulsoup(self, html_content: str) -> str:
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -131,7 +134,7 @@ class HTMLRewritingNode:
             logger.error(error_msg)
             return {
                 **state,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "html_rewriting", "message": error_msg}
                 ]
             }
@@ -155,7 +158,7 @@ class HTMLRewritingNode:
             return {
                 **state,
                 "final_html": final_html,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "info", "step": "html_rewriting", "message": f"HTML rewritten successfully. Improvements: {', '.join(improvements)}"}
                 ]
             }
@@ -166,7 +169,7 @@ class HTMLRewritingNode:
             return {
                 **state,
                 "final_html": original_html,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "html_rewriting", "message": error_msg}
                 ]
             }
\ No newline at end of file
@@ -143,7 +143,7 @@ class TemplateModificationNode:
                 "original_html": original_html,
                 "original_css": original_css,
                 "generated_content_json": json.dumps(generated_content.model_dump(), ensure_ascii=False, indent=2),
-                "spec_json": json.dumps(spec.model_dump(), ensure_ascii=False, indent=2)
+                "spec_json": json.dumps(spec.model_dump(exclude={"creative_rewrite"}), ensure_ascii=False, indent=2)
             }
             
             chain = prompt | self.llm | self.parser
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 import logging
 import asyncio
 
@@ -21,7 +21,7 @@ from src.langgraph_agents.targeted_fixing_node import TargetedFixingNode
 from src.langgraph_agents.uniqueness_node import UniquenessNode
 from src.langgraph_agents.html_rewriting_node import HTMLRewritingNode
 
-from src.models.openai_client_manager import openai_client
+from src.models.openai_client_manager import openai_client_manager
 
 logger = get_logger(__name__)
 
@@ -30,7 +30,7 @@ class WhitePageOrchestratorGraph:
 
     def __init__(self):
         self.llm = ChatOpenAI(
-            client=openai_client,
+            client=openai_client_manager.get_client(),
             model=settings.model_settings.get("model"),
             temperature=settings.model_settings.get("temperature"),
             max_tokens=settings.model_settings.get("max_tokens")
@@ -42,6 +42,7 @@ class WhitePageOrchestratorGraph:
             api_key=settings.qdrant_api_key,
             timeout=settings.qdrant_timeout,
             prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port,
             max_retries=settings.qdrant_max_retries,
             retry_delay=settings.qdrant_retry_delay,
             collection_name=settings.qdrant_collection_name,
@@ -107,7 +108,7 @@ class WhitePageOrchestratorGraph:
 
     async def generate_whitepage(self, spec: WhitePageSpec) -> GeneratedWhitePage:
         """Executes the workflow to generate a WhitePage."""
-        initial_state = create_initial_state(spec)
+        initial_state = create_initial_state(spec, creative_rewrite=spec.creative_rewrite)
         
         try:
             final_state = await self.compiled_graph.ainvoke(initial_state)
@@ -117,7 +118,31 @@ class WhitePageOrchestratorGraph:
             logger.error(f"Error generating WhitePage: {e}")
             raise
 
+    async def generate_whitepages(self, specs: List[WhitePageSpec]) -> List[Union[GeneratedWhitePage, Exception]]:
+        """
+        Executes the workflow for several specs, at most settings.max_concurrency at a time.
+        A spec that fails yields its exception in place of the page.
+        """
+        initial_states = [create_initial_state(spec, creative_rewrite=spec.creative_rewrite) for spec in specs]
+        final_states = await self.compiled_graph.abatch(
+            initial_states,
+            config={"max_concurrency": settings.max_concurrency},
+            return_exceptions=True
+        )
+        
+        results: List[Union[GeneratedWhitePage, Exception]] = []
+        for spec, final_state in zip(specs, final_states):
+            try:
+                if isinstance(final_state, Exception):
+                    raise final_state
+                results.append(get_final_result(final_state))
+            except Exception as e:
+                logger.error(f"Error generating WhitePage '{spec.page_name}': {e}")
+                results.append(e)
+        return results
+
     async def close_connections(self) -> None:
-        """Closes all connections (Qdrant, OpenAI, etc.)."""
+        """Closes all connections (Qdrant, OpenAI, etc.) and worker pools."""
         await self.qdrant_manager.close()
-        await openai_client.close()
\ No newline at end of file
+        await openai_client_manager.close()
+        self.chunked_modification_node_instance.close()
\ No newline at end of file
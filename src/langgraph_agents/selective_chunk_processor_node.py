@@ -1,6 +1,11 @@
 from typing import List, Dict, Any, Optional, Set
 from dataclasses import dataclass
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import logging
+import os
+import re
 from bs4 import BeautifulSoup
 
 from src.core.html_chunker import HTMLChunk, HTMLChunker, ChunkProcessingResult
@@ -11,6 +16,10 @@ from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Email marker and phone fragments (examples, might need more robust regex) in one alternation
+_CONTACT_PATTERN = re.compile(r"(?P<email>@)|(?P<phone>\+7|8-|495|123-45-67)")
+_CHUNK_SEPARATOR = "\x00CHUNK\x00"
+
 @dataclass
 class ChunkValidationResult:
     chunk_id: str
@@ -21,30 +30,62 @@ class ChunkValidationResult:
     needs_regeneration: bool = False
 
 class ChunkContentValidator:
+    # Score indexed by (brand_fail << 2) | (contact_fail << 1) | content_fail,
+    # i.e. the products of the 0.7 / 0.8 / 0.9 penalties
+    SCORE_PENALTIES = (1.0, 0.9, 0.8, 0.72, 0.7, 0.63, 0.56, 0.504)
+
+    GENERIC_BRANDS = (
+        "lumina jewelry", "stellar gems", "golden touch", "diamond dreams",
+        "jewelry store", "company name", "brand name", "your brand"
+    )
+    BRAND_CONTEXT_WORDS = ("jewelry", "store", "brand")
+    GENERIC_PRODUCT_WORDS = ("продукт", "товар", "украшение")
+
     def __init__(self, spec: WhitePageSpec):
         self.spec = spec
+        # Spec-derived terms are lowercased once here instead of once per chunk
+        self._brand_lower = spec.brand_name.lower()
+        self._product_terms = [product.lower() for product in spec.products] if spec.products else []
+        self._relevant_keywords = [
+            word for word in spec.business_description.lower().split() if len(word) > 4 # Filter short, common words
+        ]
+
+    def validate_chunks(self, chunk_contents: List[str]) -> List[Dict[str, Any]]:
+        chunk_starts = []
+        position = 0
+        for content in chunk_contents:
+            chunk_starts.append(position)
+            position += len(content) + len(_CHUNK_SEPARATOR)
 
-    def validate_chunk_content(self, chunk_content: str) -> Dict[str, Any]:
+        contact_markers = [set() for _ in chunk_contents]
+        for match in _CONTACT_PATTERN.finditer(_CHUNK_SEPARATOR.join(chunk_contents)):
+            contact_markers[bisect_right(chunk_starts, match.start()) - 1].add(match.lastgroup)
+
+        return [
+            self.validate_chunk_content(content, markers)
+            for content, markers in zip(chunk_contents, contact_markers)
+        ]
+
+    def validate_chunk_content(self, chunk_content: str, contact_markers: Optional[Set[str]] = None) -> Dict[str, Any]:
         errors = []
         warnings = []
-        score = 1.0
-        has_brand_mismatch = False
+        content_lower = chunk_content.lower()
 
-        brand_validation = self._validate_brand_presence(chunk_content)
-        if not brand_validation["valid"]:
-            errors.extend(brand_validation["errors"])
-            score *= 0.7
-            has_brand_mismatch = True
+        brand_validation = self._validate_brand_presence(content_lower)
+        has_brand_mismatch = not brand_validation["valid"]
+        errors.extend(brand_validation["errors"])
 
-        contact_validation = self._validate_contact_info(chunk_content)
-        if not contact_validation["valid"]:
-            errors.extend(contact_validation["errors"])
-            score *= 0.8
+        contact_validation = self._validate_contact_info(chunk_content, content_lower, contact_markers)
+        errors.extend(contact_validation["errors"])
 
-        content_validation = self._validate_content_relevance(chunk_content)
-        if not content_validation["valid"]:
-            warnings.extend(content_validation["warnings"])
-            score *= 0.9
+        content_validation = self._validate_content_relevance(content_lower)
+        warnings.extend(content_validation["warnings"])
+
+        score = self.SCORE_PENALTIES[
+            (has_brand_mismatch << 2)
+            | ((not contact_validation["valid"]) << 1)
+            | (not content_validation["valid"])
+        ]
 
         return {
             "is_valid": score >= 0.7,
@@ -54,24 +95,16 @@ class ChunkContentValidator:
             "has_brand_mismatch": has_brand_mismatch
         }
 
-    def _validate_brand_presence(self, content: str) -> Dict[str, Any]:
-        content_lower = content.lower()
-        brand_lower = self.spec.brand_name.lower()
-
-        generic_brands = [
-            "lumina jewelry", "stellar gems", "golden touch", "diamond dreams",
-            "jewelry store", "company name", "brand name", "your brand"
-        ]
-
+    def _validate_brand_presence(self, content_lower: str) -> Dict[str, Any]:
         errors = []
-        has_generic = any(generic in content_lower for generic in generic_brands)
-        has_correct_brand = brand_lower in content_lower
+        has_generic = any(generic in content_lower for generic in self.GENERIC_BRANDS)
+        has_correct_brand = self._brand_lower in content_lower
 
         if has_generic and not has_correct_brand:
             errors.append(f"Contains generic brand names instead of '{self.spec.brand_name}'")
         elif has_generic:
             errors.append(f"Contains both correct and generic brand names")
-        elif not has_correct_brand and any(word in content_lower for word in ["jewelry", "store", "brand"]):
+        elif not has_correct_brand and any(word in content_lower for word in self.BRAND_CONTEXT_WORDS):
             errors.append(f"Missing brand name '{self.spec.brand_name}' in relevant context")
 
         return {
@@ -79,21 +112,27 @@ class ChunkContentValidator:
             "errors": errors
         }
 
-    def _validate_contact_info(self, content: str) -> Dict[str, Any]:
+    def _validate_contact_info(self, content: str, content_lower: str, found: Optional[Set[str]] = None) -> Dict[str, Any]:
         errors = []
 
-        if "@" in content:
+        if found is None:
+            found = set()
+            for match in _CONTACT_PATTERN.finditer(content):
+                found.add(match.lastgroup)
+                if len(found) == 2:
+                    break
+
+        if "email" in found:
             if self.spec.contact_email not in content:
                 if "example.com" in content or "gmail.com" in content:
                     errors.append(f"Contains generic email instead of '{self.spec.contact_email}'")
 
-        phone_patterns = ["+7", "8-", "495", "123-45-67"] # These are examples, might need more robust regex
-        if any(pattern in content for pattern in phone_patterns):
+        if "phone" in found:
             if self.spec.contact_phone not in content:
                 errors.append(f"Contains incorrect phone number instead of '{self.spec.contact_phone}'")
 
         # Basic address check (can be improved with more specific patterns)
-        if "москва" in content.lower() or "moscow" in content.lower():
+        if "москва" in content_lower or "moscow" in content_lower:
             if self.spec.address not in content:
                 errors.append(f"Contains incorrect address instead of '{self.spec.address}'")
 
@@ -102,18 +141,15 @@ class ChunkContentValidator:
             "errors": errors
         }
 
-    def _validate_content_relevance(self, content: str) -> Dict[str, Any]:
+    def _validate_content_relevance(self, content_lower: str) -> Dict[str, Any]:
         warnings = []
-        content_lower = content.lower()
 
-        if self.spec.products:
-            product_terms = [product.lower() for product in self.spec.products]
-            if not any(term in content_lower for term in product_terms):
-                if any(word in content_lower for word in ["продукт", "товар", "украшение"]):
+        if self._product_terms:
+            if not any(term in content_lower for term in self._product_terms):
+                if any(word in content_lower for word in self.GENERIC_PRODUCT_WORDS):
                     warnings.append("Contains generic product references instead of specific products")
 
-        business_keywords = self.spec.business_description.lower().split()
-        relevant_keywords = [word for word in business_keywords if len(word) > 4] # Filter short, common words
+        relevant_keywords = self._relevant_keywords
 
         if len(relevant_keywords) > 0:
             matching_keywords = sum(1 for keyword in relevant_keywords if keyword in content_lower)
@@ -125,10 +161,28 @@ class ChunkContentValidator:
             "warnings": warnings
         }
 
+def _validate_chunk_batch(spec: WhitePageSpec, chunk_contents: List[str]) -> List[Dict[str, Any]]:
+    # Top-level so it can be pickled into validation worker processes
+    return ChunkContentValidator(spec).validate_chunks(chunk_contents)
+
 class SelectiveChunkProcessor:
+    PARALLEL_VALIDATION_THRESHOLD = 32
+    PARALLEL_VALIDATION_BATCH_SIZE = 8
+
     def __init__(self, chunk_processor: ChunkProcessor):
         self.chunk_processor = chunk_processor
         self.html_chunker = HTMLChunker() # HTMLChunker is stateless, can be instantiated here
+        self._validation_pool: Optional[ProcessPoolExecutor] = None # Created on first large batch
+
+    def _get_validation_pool(self) -> ProcessPoolExecutor:
+        if self._validation_pool is None:
+            self._validation_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._validation_pool
+
+    def close(self) -> None:
+        if self._validation_pool is not None:
+            self._validation_pool.shutdown(wait=True, cancel_futures=True)
+            self._validation_pool = None
 
     async def process_chunks_with_selective_retry(
         self,
@@ -141,7 +195,7 @@ class SelectiveChunkProcessor:
         chunk_results = await self._initial_chunk_processing(chunks, generated_content, spec)
 
         for attempt in range(max_retry_attempts):
-            validation_results = self._validate_chunk_results(chunk_results, spec)
+            validation_results = await self._validate_chunk_results(chunk_results, spec)
             failed_chunk_ids = self._identify_failed_chunk_ids(validation_results)
 
             if not failed_chunk_ids:
@@ -170,15 +224,28 @@ class SelectiveChunkProcessor:
             chunks, generated_content, spec
         )
 
-    def _validate_chunk_results(
+    async def _validate_chunk_results(
         self,
         chunk_results: List[ChunkProcessingResult],
         spec: WhitePageSpec
     ) -> List[ChunkValidationResult]:
         validation_results = []
-        for result in chunk_results:
-            validator = ChunkContentValidator(spec)
-            validation = validator.validate_chunk_content(result.processed_content)
+        chunk_contents = [result.processed_content for result in chunk_results]
+
+        if len(chunk_contents) > self.PARALLEL_VALIDATION_THRESHOLD:
+            # Small batches stay in-process; pickling overhead outweighs the gain there
+            batch_size = self.PARALLEL_VALIDATION_BATCH_SIZE
+            batches = [chunk_contents[i:i + batch_size] for i in range(0, len(chunk_contents), batch_size)]
+            loop = asyncio.get_running_loop()
+            pool = self._get_validation_pool()
+            batch_results = await asyncio.gather(*(
+                loop.run_in_executor(pool, _validate_chunk_batch, spec, batch) for batch in batches
+            ))
+            validations = [validation for batch in batch_results for validation in batch]
+        else:
+            validations = _validate_chunk_batch(spec, chunk_contents)
+
+        for result, validation in zip(chunk_results, validations):
             validation_results.append(ChunkValidationResult(
                 chunk_id=result.chunk_id,
                 is_valid=validation["is_valid"],
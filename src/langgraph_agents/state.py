@@ -1,4 +1,5 @@
-from typing import Dict, Any, Optional, List
+import operator
+from typing import Annotated, Dict, Any, Optional, List
 from datetime import datetime
 from enum import Enum
 from typing_extensions import TypedDict
@@ -33,16 +34,19 @@ class GraphState(TypedDict, total=False):
     final_html: str
     final_css: str
     final_validation: ValidationResult
+    pending_uniqueness: Optional[Dict[str, str]]
     metrics: GenerationMetrics
     original_template_size: int
     
     should_retry_pipeline: bool
     should_apply_targeted_fixes: bool
     should_proceed_to_uniqueness: bool
+    targeted_fix_attempts: int
+    creative_rewrite: bool
     
-    messages: List[Dict[str, Any]]
+    messages: Annotated[List[Dict[str, Any]], operator.add]
 
-def create_initial_state(spec: WhitePageSpec) -> GraphState:
+def create_initial_state(spec: WhitePageSpec, creative_rewrite: bool = False) -> GraphState:
     return GraphState(
         spec=spec,
         brand_name=spec.brand_name,
@@ -55,20 +59,12 @@ def create_initial_state(spec: WhitePageSpec) -> GraphState:
             is_valid=False,
             errors=["Page generation not completed"]
         ),
-        metrics=GenerationMetrics(
-            html_size_reduction=0.0,
-            validation_score=0.0,
-            retry_count=0,
-            chunks_processed=0,
-            chunks_failed=0,
-            targeted_fixes_applied=0,
-            failed_steps=[],
-            current_attempt=0
-        ),
         original_template_size=0,
         should_retry_pipeline=False,
         should_apply_targeted_fixes=False,
         should_proceed_to_uniqueness=False,
+        targeted_fix_attempts=0,
+        creative_rewrite=creative_rewrite,
         messages=[]
     )
 
@@ -76,9 +72,7 @@ def calculate_size_reduction(state: GraphState) -> None:
     if state.get("original_template_size", 0) > 0:
         current_size = len(state.get("final_html", ""))
         reduction = ((state["original_template_size"] - current_size) / state["original_template_size"]) * 100
-        if "metrics" not in state:
-            state["metrics"] = GenerationMetrics()
-        state["metrics"]["html_size_reduction"] = reduction
+        state.setdefault("metrics", GenerationMetrics())["html_size_reduction"] = reduction
 
 def get_final_result(state: GraphState) -> GeneratedWhitePage:
     calculate_size_reduction(state)
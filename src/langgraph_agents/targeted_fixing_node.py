@@ -1,21 +1,50 @@
-from typing import List, Dict, Any, Optional, Set, Tuple, Union
+from typing import List, Dict, Any, Optional, Pattern, Set, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 import logging
 import re
 from abc import ABC, abstractmethod
+import asyncio
 
+import soupsieve
 from bs4 import BeautifulSoup, Tag
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
 from src.models.pydantic_models import WhitePageSpec, ValidationResult
-from src.langgraph_agents.state import GraphState
+from src.langgraph_agents.state import GraphState, GenerationMetrics
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+_EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+_PHONE_RE = re.compile(r"\+?[\d\s\-\(\)]{10,}")
+_CONTACT_RE = re.compile(f"{_EMAIL_RE.pattern}|{_PHONE_RE.pattern}")
+
+
+def clean_llm_html_output(html_string: str) -> str:
+    html_string = html_string.strip()
+    if html_string.startswith("```html"):
+        html_string = html_string[len("```html"):].strip()
+    elif html_string.startswith("```"):
+        html_string = html_string[len("```"):].strip()
+    if html_string.endswith("```"):
+        html_string = html_string[:-len("```")].strip()
+    return html_string
+
+
+@lru_cache(maxsize=256)
+def _compile_selector(selector: str) -> soupsieve.SoupSieve:
+    return soupsieve.compile(selector)
+
+
+@lru_cache(maxsize=64)
+def _brand_pattern(brands: Tuple[str, ...]) -> Pattern[str]:
+    alternatives = sorted(brands, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)), re.IGNORECASE)
+
 
 class SeverityLevel(Enum):
     CRITICAL = "critical"
@@ -31,7 +60,7 @@ class IssueType(Enum):
     LANGUAGE_MISMATCH = "language_mismatch"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ValidationIssue:
     issue_type: IssueType
     severity: SeverityLevel
@@ -42,7 +71,7 @@ class ValidationIssue:
     replacement_values: Dict[str, str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ValidationContext:
     original_errors: Tuple[str, ...]
     validation_score: float
@@ -57,9 +86,9 @@ class HTMLProcessor:
     @staticmethod
     def safe_select(soup: BeautifulSoup, selector: str) -> List[Tag]:
         try:
-            return soup.select(selector)
+            return _compile_selector(selector).select(soup)
         except Exception as e:
-            logger.debug(f"Selector {selector} failed: {e}")
+            logger.debug("Selector %s failed: %s", selector, e)
             return []
     
     @staticmethod
@@ -71,9 +100,17 @@ class HTMLProcessor:
             element.string = new_text
     
     @staticmethod
-    def find_elements_by_pattern(soup: BeautifulSoup, pattern: str, tags: List[str] = None) -> List[Tag]:
-        tags = tags or ['a', 'span', 'div', 'p']
-        return soup.find_all(tags, string=re.compile(pattern))
+    def find_elements_by_pattern(
+        soup: BeautifulSoup, 
+        pattern: Pattern[str], 
+        tags: Tuple[str, ...] = ('a', 'span', 'div', 'p')
+    ) -> List[Tag]:
+        tag_set = frozenset(tags)
+        return [
+            element for element in soup.descendants
+            if isinstance(element, Tag) and element.name in tag_set
+            and element.string and pattern.search(element.string)
+        ]
 
 
 class ValidationAnalyzer:
@@ -83,6 +120,7 @@ class ValidationAnalyzer:
         "Lumina Jewelry", "Stellar Gems", "Golden Touch", 
         "Diamond Dreams", "Company Name"
     ])
+    _GENERIC_BRAND_PAIRS = tuple((brand, brand.lower()) for brand in _GENERIC_BRANDS)
     
     _BRAND_SELECTORS = (
         "h1", "h2", "h3", ".brand-name", ".company-name", 
@@ -111,6 +149,10 @@ class ValidationAnalyzer:
             "russian": self._create_language_issue,
             "english": self._create_language_issue,
         }
+        self._keyword_priority = {keyword: i for i, keyword in enumerate(self._error_handlers)}
+        self._keyword_pattern = re.compile(
+            "(?=(" + "|".join(map(re.escape, self._error_handlers)) + "))"
+        )
 
     def analyze_validation_errors(
         self, 
@@ -118,8 +160,9 @@ class ValidationAnalyzer:
         html_content: str
     ) -> List[ValidationIssue]:
         issues = []
+        html_lower = html_content.lower()
         for error in validation_result.errors:
-            issue = self._categorize_and_create_issue(error, html_content)
+            issue = self._categorize_and_create_issue(error, html_lower)
             if issue:
                 issues.append(issue)
         return issues
@@ -127,20 +170,19 @@ class ValidationAnalyzer:
     def _categorize_and_create_issue(
         self, 
         error: str, 
-        html_content: str
+        html_lower: str
     ) -> Optional[ValidationIssue]:
-        error_lower = error.lower()
+        matches = self._keyword_pattern.findall(error.lower())
+        if not matches:
+            return None
         
-        for keyword, handler in self._error_handlers.items():
-            if keyword in error_lower:
-                return handler(error, html_content)
-        
-        return None
+        keyword = min(matches, key=self._keyword_priority.__getitem__)
+        return self._error_handlers[keyword](error, html_lower)
 
-    def _create_brand_issue(self, error: str, html_content: str) -> ValidationIssue:
+    def _create_brand_issue(self, error: str, html_lower: str) -> ValidationIssue:
         found_brands = tuple(
-            brand for brand in self._GENERIC_BRANDS 
-            if brand.lower() in html_content.lower()
+            brand for brand, brand_lower in self._GENERIC_BRAND_PAIRS 
+            if brand_lower in html_lower
         )
         
         return ValidationIssue(
@@ -153,7 +195,7 @@ class ValidationAnalyzer:
             replacement_values={brand: self.spec.brand_name for brand in found_brands}
         )
 
-    def _create_contact_issue(self, error: str, html_content: str) -> ValidationIssue:
+    def _create_contact_issue(self, error: str, html_lower: str) -> ValidationIssue:
         return ValidationIssue(
             issue_type=IssueType.CONTACT_MISMATCH,
             severity=SeverityLevel.MAJOR,
@@ -167,7 +209,7 @@ class ValidationAnalyzer:
             }
         )
 
-    def _create_address_issue(self, error: str, html_content: str) -> ValidationIssue:
+    def _create_address_issue(self, error: str, html_lower: str) -> ValidationIssue:
         return ValidationIssue(
             issue_type=IssueType.ADDRESS_MISMATCH,
             severity=SeverityLevel.MAJOR,
@@ -178,7 +220,7 @@ class ValidationAnalyzer:
             replacement_values={"address": self.spec.address}
         )
 
-    def _create_product_issue(self, error: str, html_content: str) -> ValidationIssue:
+    def _create_product_issue(self, error: str, html_lower: str) -> ValidationIssue:
         products_text = ", ".join(self.spec.products[:3]) if self.spec.products else ""
         
         return ValidationIssue(
@@ -191,7 +233,7 @@ class ValidationAnalyzer:
             replacement_values={"products": products_text}
         )
 
-    def _create_language_issue(self, error: str, html_content: str) -> ValidationIssue:
+    def _create_language_issue(self, error: str, html_lower: str) -> ValidationIssue:
         return ValidationIssue(
             issue_type=IssueType.LANGUAGE_MISMATCH,
             severity=SeverityLevel.MAJOR,
@@ -209,128 +251,136 @@ class BaseFixer(ABC):
     @abstractmethod
     async def fix(
         self, 
-        html_content: str, 
+        soup: BeautifulSoup, 
         issue: ValidationIssue, 
         spec: WhitePageSpec
-    ) -> str:
+    ) -> BeautifulSoup:
         pass
 
 
-class BrandFixer(BaseFixer):
-    """Handles brand name related fixes."""
+class DOMFixer(BaseFixer):
+    """Base class for fixers that only edit the parsed document locally."""
+    
+    @abstractmethod
+    def apply(
+        self, 
+        soup: BeautifulSoup, 
+        issue: ValidationIssue, 
+        spec: WhitePageSpec
+    ) -> BeautifulSoup:
+        pass
     
     async def fix(
         self, 
-        html_content: str, 
+        soup: BeautifulSoup, 
         issue: ValidationIssue, 
         spec: WhitePageSpec
-    ) -> str:
-        fixed_html = html_content
-        
-        for old_brand in issue.search_patterns:
-            if old_brand in fixed_html:
-                fixed_html = re.sub(
-                    re.escape(old_brand), 
-                    spec.brand_name, 
-                    fixed_html, 
-                    flags=re.IGNORECASE
-                )
-        
-        soup = BeautifulSoup(fixed_html, 'html.parser')
+    ) -> BeautifulSoup:
+        return self.apply(soup, issue, spec)
+
+
+class BrandFixer(DOMFixer):
+    """Handles brand name related fixes."""
+    
+    def apply(
+        self, 
+        soup: BeautifulSoup, 
+        issue: ValidationIssue, 
+        spec: WhitePageSpec
+    ) -> BeautifulSoup:
+        if not issue.search_patterns:
+            return soup
         
-        for selector in issue.affected_selectors:
-            elements = HTMLProcessor.safe_select(soup, selector)
-            for element in elements:
-                if element.string and any(
-                    pattern.lower() in element.string.lower() 
-                    for pattern in issue.search_patterns
-                ):
-                    HTMLProcessor.update_element_text(element, spec.brand_name)
+        pattern = _brand_pattern(issue.search_patterns)
+        for node in soup.find_all(string=pattern):
+            node.replace_with(type(node)(pattern.sub(spec.brand_name, node)))
+        # Meta content, og:*, alt and title carry the brand too; keep parity with the raw-markup fast path
+        for element in soup.find_all(True):
+            for attr, value in element.attrs.items():
+                if isinstance(value, str):
+                    if pattern.search(value):
+                        element[attr] = pattern.sub(spec.brand_name, value)
+                elif any(pattern.search(item) for item in value):
+                    element[attr] = [pattern.sub(spec.brand_name, item) for item in value]
+
+        patterns_lower = tuple(pattern.lower() for pattern in issue.search_patterns)
+        elements = HTMLProcessor.safe_select(soup, ", ".join(issue.affected_selectors))
+        for element in elements:
+            if not element.string:
+                continue
+            string_lower = element.string.lower()
+            if any(pattern in string_lower for pattern in patterns_lower):
+                HTMLProcessor.update_element_text(element, spec.brand_name)
         
-        return str(soup)
+        return soup
 
 
-class ContactFixer(BaseFixer):
+class ContactFixer(DOMFixer):
     """Handles contact information related fixes."""
     
-    _EMAIL_PATTERN = r"[\w\.-]+@[\w\.-]+\.\w+"
-    _PHONE_PATTERN = r"\+?[\d\s\-\(\)]{10,}"
-    
-    async def fix(
+    def apply(
         self, 
-        html_content: str, 
+        soup: BeautifulSoup, 
         issue: ValidationIssue, 
         spec: WhitePageSpec
-    ) -> str:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        self._fix_email_elements(soup, spec.contact_email)
-        self._fix_phone_elements(soup, spec.contact_phone)
+    ) -> BeautifulSoup:
+        contact_elements = HTMLProcessor.find_elements_by_pattern(soup, _CONTACT_RE)
         
-        return str(soup)
-    
-    def _fix_email_elements(self, soup: BeautifulSoup, email: str) -> None:
-        email_elements = HTMLProcessor.find_elements_by_pattern(
-            soup, self._EMAIL_PATTERN
-        )
+        for element in contact_elements:
+            self._fix_contact_element(element, spec.contact_email, spec.contact_phone)
         
-        for element in email_elements:
-            if element.string and '@' in element.string and 'example.com' not in element.string:
-                HTMLProcessor.update_element_text(element, email)
-                if element.name == 'a':
-                    element['href'] = f"mailto:{email}"
+        return soup
     
-    def _fix_phone_elements(self, soup: BeautifulSoup, phone: str) -> None:
-        phone_elements = HTMLProcessor.find_elements_by_pattern(
-            soup, self._PHONE_PATTERN
-        )
+    def _fix_contact_element(self, element: Tag, email: str, phone: str) -> None:
+        text = element.string
+        if not text:
+            return
         
-        for element in phone_elements:
-            if element.string and any(char.isdigit() for char in element.string):
-                HTMLProcessor.update_element_text(element, phone)
-                if element.name == 'a':
-                    element['href'] = f"tel:{phone}"
+        if _EMAIL_RE.search(text) and '@' in text and 'example.com' not in text:
+            HTMLProcessor.update_element_text(element, email)
+            if element.name == 'a':
+                element['href'] = f"mailto:{email}"
+        elif _PHONE_RE.search(text) and any(char.isdigit() for char in text):
+            HTMLProcessor.update_element_text(element, phone)
+            if element.name == 'a':
+                element['href'] = f"tel:{phone}"
 
 
-class AddressFixer(BaseFixer):
+class AddressFixer(DOMFixer):
     """Handles address related fixes."""
     
-    async def fix(
+    def apply(
         self, 
-        html_content: str, 
+        soup: BeautifulSoup, 
         issue: ValidationIssue, 
         spec: WhitePageSpec
-    ) -> str:
-        soup = BeautifulSoup(html_content, 'html.parser')
+    ) -> BeautifulSoup:
+        elements = HTMLProcessor.safe_select(soup, ", ".join(issue.affected_selectors))
+        for element in elements:
+            if element.get_text():
+                HTMLProcessor.update_element_text(element, spec.address)
         
-        for selector in issue.affected_selectors:
-            elements = HTMLProcessor.safe_select(soup, selector)
-            for element in elements:
-                if element.get_text():
-                    HTMLProcessor.update_element_text(element, spec.address)
-        
-        return str(soup)
+        return soup
 
 
-class ProductFixer(BaseFixer):
+class ProductFixer(DOMFixer):
     """Handles product listing related fixes."""
     
-    async def fix(
+    def apply(
         self, 
-        html_content: str, 
+        soup: BeautifulSoup, 
         issue: ValidationIssue, 
         spec: WhitePageSpec
-    ) -> str:
+    ) -> BeautifulSoup:
         if not spec.products:
-            return html_content
+            return soup
         
-        soup = BeautifulSoup(html_content, 'html.parser')
-        product_sections = soup.select(', '.join(issue.affected_selectors))
+        product_sections = HTMLProcessor.safe_select(soup, ', '.join(issue.affected_selectors))
         
         for section in product_sections:
             self._update_product_list(section, spec.products)
         
-        return str(soup)
+        return soup
     
     def _update_product_list(self, section: Tag, products: List[str]) -> None:
         product_list = section.find('ul') or section.find('ol')
@@ -347,25 +397,100 @@ class ProductFixer(BaseFixer):
 class LLMFixer(BaseFixer):
     """Uses LLM for complex fixes like language translation."""
     
+    MAX_CONCURRENCY = 4
+    MAX_SEGMENT_CHARS = 8000
+    MIN_LENGTH_RATIO = 0.5
+    
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
         self.str_parser = StrOutputParser()
+        self.language_chain = self._create_language_prompt() | self.llm | self.str_parser
     
     async def fix(
         self, 
-        html_content: str, 
+        soup: BeautifulSoup, 
         issue: ValidationIssue, 
         spec: WhitePageSpec
-    ) -> str:
+    ) -> BeautifulSoup:
         if issue.issue_type == IssueType.LANGUAGE_MISMATCH:
-            return await self._fix_language_issues(html_content, spec)
+            return await self.batch_fix(soup, spec)
         
-        return html_content
+        return soup
     
-    async def _fix_language_issues(self, html_content: str, spec: WhitePageSpec) -> str:
-        """Fix language issues in HTML content by translating to match brand language."""
+    async def batch_fix(self, soup: BeautifulSoup, spec: WhitePageSpec) -> BeautifulSoup:
+        """Translate the top-level body sections with concurrent streamed LLM calls."""
+        segments = self._collect_segments(soup.body or soup)
+        if not segments:
+            return soup
+        
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        
+        async def translate_segment(segment: Tag) -> bool:
+            source_html = str(segment)
+            async with semaphore:
+                parts = []
+                async for chunk in self.language_chain.astream({
+                    "html_content": source_html,
+                    "brand_name": spec.brand_name,
+                    "business_description": spec.business_description
+                }):
+                    parts.append(chunk)
+            
+            result = clean_llm_html_output("".join(parts))
+            if not result.startswith("<"):
+                logger.warning(f"Rejected non-HTML language fix reply for <{segment.name}> section: {result[:80]!r}")
+                return False
+            if not self._is_complete_section(segment, source_html, result):
+                logger.warning(
+                    f"Rejected incomplete language fix reply for <{segment.name}> section "
+                    f"({len(result)}/{len(source_html)} chars): {result[-80:]!r}"
+                )
+                return False
+            
+            fragment = BeautifulSoup(result, 'html.parser')
+            segment.replace_with(*list(fragment.contents))
+            return True
+        
+        results = await asyncio.gather(
+            *(translate_segment(segment) for segment in segments), 
+            return_exceptions=True
+        )
+        
+        translated = 0
+        for segment, result in zip(segments, results):
+            if isinstance(result, Exception):
+                logger.warning("LLM language fix failed for <%s> section: %s", segment.name, result)
+            elif result:
+                translated += 1
         
-        prompt = ChatPromptTemplate.from_messages([
+        logger.info(f"Translated {translated}/{len(segments)} sections")
+        return soup
+    
+    def _is_complete_section(self, segment: Tag, source_html: str, result: str) -> bool:
+        """Reject truncated replies: too short, or missing the section's closing tag."""
+        if len(result) < len(source_html) * self.MIN_LENGTH_RATIO:
+            return False
+        if segment.can_be_empty_element:
+            return True
+        return result.rstrip().lower().endswith(f"</{segment.name.lower()}>")
+    
+    def _collect_segments(self, container: Tag) -> List[Tag]:
+        """Split the container into sections that fit MAX_SEGMENT_CHARS, descending into oversized ones."""
+        segments = []
+        for child in container.children:
+            if not isinstance(child, Tag):
+                continue
+            if len(str(child)) <= self.MAX_SEGMENT_CHARS:
+                segments.append(child)
+            elif any(isinstance(grandchild, Tag) for grandchild in child.children):
+                segments.extend(self._collect_segments(child))
+            else:
+                logger.warning(f"Skipping oversized <{child.name}> section for language fix")
+        return segments
+    
+    @staticmethod
+    def _create_language_prompt() -> ChatPromptTemplate:
+        return ChatPromptTemplate.from_messages([
             ("system", """
             Fix language issues in this HTML by translating content to match the language of the brand and business description.
             Focus on maintaining HTML structure while updating text content.
@@ -383,28 +508,12 @@ class LLMFixer(BaseFixer):
             Return ONLY the corrected HTML with content in the appropriate language. Do NOT include markdown or additional text.
             """),
             ("human", """
-            HTML content (first 8000 characters):
+            HTML content:
             ```html
             {html_content}
             ```
             """)
         ])
-        
-        chain = prompt | self.llm | self.str_parser
-        
-        try:
-            result = await chain.ainvoke({
-                "html_content": html_content[:8000],
-                "brand_name": spec.brand_name,
-                "business_description": spec.business_description
-            })
-            
-            if result and len(result.strip()) > 1000:
-                return result.strip()
-        except Exception as e:
-            logger.error(f"LLM language fix failed: {e}")
-        
-        return html_content
 
 
 class FixerFactory:
@@ -435,22 +544,43 @@ class TargetedHTMLFixer:
         issues: List[ValidationIssue],
         spec: WhitePageSpec
     ) -> str:
-        fixed_html = html_content
+        if (
+            len(issues) == 1 
+            and issues[0].issue_type == IssueType.BRAND_MISMATCH 
+            and issues[0].search_patterns
+        ):
+            logger.info("Applied fix for %s: %.50s...", issues[0].issue_type.value, issues[0].description)
+            return _brand_pattern(issues[0].search_patterns).sub(spec.brand_name, html_content)
+        
+        soup = BeautifulSoup(html_content, 'lxml')
         
         sorted_issues = sorted(
             issues, 
             key=lambda x: (x.severity.value, x.issue_type.value)
         )
         
+        language_issues = []
+        
         for issue in sorted_issues:
+            fixer = self.fixer_factory.get_fixer(issue.issue_type)
+            if not isinstance(fixer, DOMFixer):
+                language_issues.append(issue)
+                continue
             try:
-                fixer = self.fixer_factory.get_fixer(issue.issue_type)
-                fixed_html = await fixer.fix(fixed_html, issue, spec)
-                logger.info(f"Applied fix for {issue.issue_type.value}: {issue.description[:50]}...")
+                soup = fixer.apply(soup, issue, spec)
+                logger.info("Applied fix for %s: %.50s...", issue.issue_type.value, issue.description)
             except Exception as e:
                 logger.error(f"Failed to apply fix for {issue.issue_type.value}: {e}")
         
-        return fixed_html
+        if language_issues:
+            try:
+                llm_fixer = self.fixer_factory.get_fixer(IssueType.LANGUAGE_MISMATCH)
+                soup = await llm_fixer.batch_fix(soup, spec)
+                logger.info(f"Applied language fix for {len(language_issues)} issues")
+            except Exception as e:
+                logger.error(f"Failed to apply fix for {IssueType.LANGUAGE_MISMATCH.value}: {e}")
+        
+        return str(soup)
 
 
 class TargetedFixingNode:
@@ -484,7 +614,7 @@ class TargetedFixingNode:
                 final_html, issues, spec
             )
 
-            metrics = state.get("metrics", {})
+            metrics = state.setdefault("metrics", GenerationMetrics())
             metrics["targeted_fixes_applied"] = metrics.get("targeted_fixes_applied", 0) + len(issues)
 
             return {
@@ -493,7 +623,7 @@ class TargetedFixingNode:
                 "metrics": metrics,
                 "should_proceed_to_uniqueness": True,
                 "should_apply_targeted_fixes": False,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "info", "step": "targeted_fixing", 
                      "message": f"Applied {len(issues)} targeted fixes, proceeding to uniqueness"}
                 ]
@@ -509,7 +639,7 @@ class TargetedFixingNode:
             **state,
             "should_retry_pipeline": True,
             "should_apply_targeted_fixes": False,
-            "messages": state.get("messages", []) + [
+            "messages": [
                 {"type": "error", "step": "targeted_fixing", "message": error_msg}
             ]
         }
@@ -519,7 +649,7 @@ class TargetedFixingNode:
             **state,
             "should_proceed_to_uniqueness": True,
             "should_apply_targeted_fixes": False,
-            "messages": state.get("messages", []) + [
+            "messages": [
                 {"type": "info", "step": "targeted_fixing", "message": message}
             ]
         }
\ No newline at end of file
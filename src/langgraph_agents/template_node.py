@@ -1,6 +1,6 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+from functools import lru_cache
 import logging
-import re
 
 from src.models.pydantic_models import WhitePageSpec, FullPageTemplate
 from src.tools.qdrant_manager import AsyncQdrantManager
@@ -10,16 +10,9 @@ from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-class TemplateSelectionNode:
-    def __init__(self, qdrant_manager: AsyncQdrantManager, template_loader: TemplateLoader) -> None:
-        self._qdrant = qdrant_manager
-        self._template_loader = template_loader
-        self.fallback_template = self._create_fallback_template()
-
-    def _create_fallback_template(self) -> FullPageTemplate:
-        return FullPageTemplate(
-            name="fallback_template",
-            html="""<!DOCTYPE html>
+_FALLBACK_TEMPLATE = FullPageTemplate(
+    name="fallback_template",
+    html="""<!DOCTYPE html>
 <html lang="ru">
 <head>
     <meta charset="UTF-8">
@@ -86,50 +79,69 @@ class TemplateSelectionNode:
     </footer>
 </body>
 </html>""",
-            css="",
-            description="Универсальный резервный шаблон для любого типа страницы",
-            tags=["fallback", "universal", "basic"]
-        )
+    css="",
+    description="Универсальный резервный шаблон для любого типа страницы",
+    tags=["fallback", "universal", "basic"]
+)
 
-    async def _select_best_template(self, templates: List[FullPageTemplate], spec: WhitePageSpec) -> FullPageTemplate:
-        page_type_scores = {}
 
-        for template in templates:
-            score = 0
+@lru_cache(maxsize=128)
+def _score_template(
+    page_type: Optional[str],
+    desc_words: Tuple[str, ...],
+    name: str,
+    description: str,
+    tags: Tuple[str, ...],
+    search_text: str
+) -> int:
+    score = 0
 
-            if spec.page_type and spec.page_type.value in template.name.lower():
-                score += 100
+    if page_type:
+        if page_type in name.lower():
+            score += 100
+        if page_type in description.lower():
+            score += 50
+        score += 25 * sum(1 for tag in tags if page_type in tag.lower())
 
-            if spec.page_type and spec.page_type.value in template.description.lower():
-                score += 50
+    if desc_words:
+        # Substring match per description word, repeats included ("jewel" matches "jewelry")
+        score += sum(1 for word in desc_words if word in search_text) * 10
 
-            for tag in template.tags:
-                if spec.page_type and spec.page_type.value in tag.lower():
-                    score += 25
+    return score
 
-            if spec.page_description:
-                desc_words = spec.page_description.lower().split()
-                template_text = f"{template.description} {' '.join(template.tags)}".lower()
-                matching_words = sum(1 for word in desc_words if word in template_text)
-                score += matching_words * 10
 
-            page_type_scores[template.name] = score
-            logger.debug(f"Template {template.name} scored: {score}")
+class TemplateSelectionNode:
+    def __init__(self, qdrant_manager: AsyncQdrantManager, template_loader: TemplateLoader) -> None:
+        self._qdrant = qdrant_manager
+        self._template_loader = template_loader
+        self.fallback_template = _FALLBACK_TEMPLATE
+
+    async def _select_best_template(self, templates: List[FullPageTemplate], spec: WhitePageSpec) -> FullPageTemplate:
+        page_type = spec.page_type.value if spec.page_type else None
+        desc_words = tuple(spec.page_description.lower().split()) if spec.page_description else ()
 
-        if not page_type_scores:
+        best_template = None
+        best_score = -1
+        for template in templates:
+            score = _score_template(
+                page_type, desc_words, template.name, template.description,
+                tuple(template.tags), template.search_text
+            )
+            logger.debug("Template %s scored: %d", template.name, score)
+            if score > best_score:
+                best_score, best_template = score, template
+
+        if best_template is None:
             logger.warning("No templates scored, returning fallback.")
             return self.fallback_template
 
-        best_template_name = max(page_type_scores, key=page_type_scores.get)
-        best_template = next((t for t in templates if t.name == best_template_name), self.fallback_template)
-
-        logger.info(f"Best template selected: {best_template.name} with score: {page_type_scores.get(best_template_name, 0)}")
+        logger.info(f"Best template selected: {best_template.name} with score: {best_score}")
         return best_template
 
-    def _has_css_styling(self, template: FullPageTemplate) -> bool:
+    def _has_css_styling(self, template: FullPageTemplate, html_lower: str) -> bool:
         has_external_css = bool(template.css and template.css.strip())
-        has_inline_css = bool(re.search(r'<style[^>]*>.*?</style>', template.html, re.DOTALL | re.IGNORECASE))
-        has_style_links = bool(re.search(r'<link[^>]*rel=["\']stylesheet["\'][^>]*>', template.html, re.IGNORECASE))
+        has_inline_css = '<style' in html_lower
+        has_style_links = 'rel="stylesheet"' in html_lower or "rel='stylesheet'" in html_lower
         return has_external_css or has_inline_css or has_style_links
 
     def _validate_template_detailed(self, template: FullPageTemplate) -> Dict[str, Any]:
@@ -137,17 +149,18 @@ class TemplateSelectionNode:
             return {"is_valid": False, "reason": "Template is None"}
         if not template.html:
             return {"is_valid": False, "reason": "Template HTML is empty"}
-        if not self._has_css_styling(template):
-            return {"is_valid": False, "reason": "Template has no CSS styling (neither external, inline, nor linked)"}
 
         html_lower = template.html.lower()
+        if not self._has_css_styling(template, html_lower):
+            return {"is_valid": False, "reason": "Template has no CSS styling (neither external, inline, nor linked)"}
+
         required_tags = ["<!doctype html>", "<html", "<head>", "<body"]
         missing_tags = [tag for tag in required_tags if tag not in html_lower]
 
         if missing_tags:
             return {"is_valid": False, "reason": f"Missing required HTML tags: {missing_tags}"}
 
-        logger.debug(f"Template {template.name} validation passed")
+        logger.debug("Template %s validation passed", template.name)
         return {"is_valid": True, "reason": "Template is valid"}
 
     async def template_selection_node(self, state: GraphState) -> Dict[str, Any]:
@@ -182,7 +195,7 @@ class TemplateSelectionNode:
                 **state,
                 "selected_template": selected_template,
                 "original_template_size": original_template_size,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": message_type, "step": "template_selection", "message": message}
                 ]
             }
@@ -195,7 +208,7 @@ class TemplateSelectionNode:
                 **state,
                 "selected_template": self.fallback_template,
                 "original_template_size": len(self.fallback_template.html),
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "template_selection", "message": error_msg}
                 ]
             }
\ No newline at end of file
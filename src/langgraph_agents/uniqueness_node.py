@@ -1,18 +1,72 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional
+from types import MappingProxyType
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
 import logging
+import random
 import re
+import zlib
 
+import orjson
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
 from src.models.pydantic_models import WhitePageSpec
 from src.langgraph_agents.state import GraphState
+from src.langgraph_agents.content_node import clean_llm_json_output
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# The old per-class space doubling was always collapsed again by the
+# whitespace rule, so only the tag, gap and whitespace rules remain.
+_BASIC_RE = re.compile(r'<(div|span)>(?:\s+(?=<))?|>\s+(?=<)')
+_WS_RUN_RE = re.compile(r'\s{2,}')
+_CSS_RE = re.compile(r'([;{,])\s*|\s*\}')
+_TAG_ATTRS_RE = re.compile(r'<([a-zA-Z][\w:-]*)(\s[^<>]*?)(\s*/?)>')
+_ATTR_RE = re.compile(r'''\s*([^\s"'<>/=]+)(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'=<>`]+))?''')
+_CSS_BLOCK_RE = re.compile(r'\{([^{}]*)\}')
+# Longhands that no other member of the set overrides, so their relative order
+# inside one block never changes which value wins. Shorthands (font, border-*,
+# flex-flow, inset, place-*, ...) and logical properties are deliberately absent.
+_SHUFFLE_SAFE_PROPERTIES = frozenset({
+    'color', 'background-color', 'opacity', 'cursor', 'display', 'visibility',
+    'position', 'z-index', 'float', 'clear', 'box-sizing', 'vertical-align',
+    'top', 'right', 'bottom', 'left',
+    'width', 'height', 'min-width', 'min-height', 'max-width', 'max-height',
+    'margin-top', 'margin-right', 'margin-bottom', 'margin-left',
+    'padding-top', 'padding-right', 'padding-bottom', 'padding-left',
+    'font-family', 'font-size', 'font-weight', 'font-style', 'line-height',
+    'letter-spacing', 'word-spacing', 'text-align', 'text-transform', 'text-indent',
+    'white-space', 'word-break', 'text-overflow', 'overflow-x', 'overflow-y',
+    'box-shadow', 'text-shadow', 'transform', 'pointer-events', 'object-fit',
+    'flex-direction', 'flex-wrap', 'flex-grow', 'flex-shrink', 'flex-basis', 'order',
+    'justify-content', 'align-items', 'align-content', 'align-self',
+    'row-gap', 'column-gap', 'grid-template-columns', 'grid-template-rows',
+    'list-style-type',
+})
+
+
+def _basic_replacement(match: re.Match) -> str:
+    if match.group(1):
+        return f'<{match.group(1)} >'
+    return '>'
+
+
+def _collapse_ws(text: str) -> str:
+    return _WS_RUN_RE.sub(' ', text)
+
+
+def _css_replacement(match: re.Match) -> str:
+    separator = match.group(1)
+    if separator is None:
+        return ' }'
+    if match.string.startswith('}', match.end()):
+        return separator
+    return separator + ' '
+
 
 class UniquenessOutput(BaseModel):
     html_content: str = Field(..., description="Unique HTML content")
@@ -22,60 +76,62 @@ class UniquenessOutput(BaseModel):
 class HTMLSanitizer:
     
     @staticmethod
-    def extract_safe_content(html_content: str) -> Dict[str, str]:
+    @lru_cache(maxsize=8)
+    def extract_safe_content(html_content: str) -> Mapping[str, Any]:
+        # The result is cached and shared between callers, so it is handed out read-only
         try:
-            from bs4 import BeautifulSoup
+            from lxml import html as lxml_html
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            root = lxml_html.document_fromstring(html_content)
             
             style_blocks = []
-            for style_tag in soup.find_all('style'):
-                if style_tag.string:
-                    style_blocks.append(style_tag.string)
-                style_tag.decompose()
-            
             script_blocks = []
-            for script_tag in soup.find_all('script'):
-                if script_tag.string and 'application/ld+json' not in script_tag.get('type', ''):
-                    script_blocks.append(script_tag.string)
-                script_tag.decompose()
+            for element in list(root.iter('style', 'script')):
+                if element.text:
+                    if element.tag == 'style':
+                        style_blocks.append(element.text)
+                    elif 'application/ld+json' not in element.get('type', ''):
+                        script_blocks.append(element.text)
+                element.drop_tree()
             
-            clean_html = str(soup)
+            clean_html = lxml_html.tostring(root.getroottree(), encoding='unicode')
             
-            return {
+            return MappingProxyType({
                 'clean_html': clean_html,
                 'style_content': ' '.join(style_blocks),
                 'script_content': ' '.join(script_blocks),
                 'original_length': len(html_content)
-            }
+            })
             
         except Exception as e:
             logger.warning(f"Error sanitizing HTML: {e}")
-            return {
+            return MappingProxyType({
                 'clean_html': html_content[:5000],
                 'style_content': '',
                 'script_content': '',
                 'original_length': len(html_content)
-            }
+            })
 
     @staticmethod
     def reconstruct_html(clean_html: str, style_content: str, script_content: str) -> str:
         try:
-            from bs4 import BeautifulSoup
+            from lxml import html as lxml_html
             
-            soup = BeautifulSoup(clean_html, 'html.parser')
+            root = lxml_html.document_fromstring(clean_html)
+            head = root.find('head')
+            body = root.find('body')
             
-            if style_content and soup.head:
-                style_tag = soup.new_tag('style')
-                style_tag.string = style_content
-                soup.head.append(style_tag)
+            if style_content and head is not None:
+                style_tag = lxml_html.Element('style')
+                style_tag.text = style_content
+                head.append(style_tag)
             
-            if script_content and soup.body:
-                script_tag = soup.new_tag('script')
-                script_tag.string = script_content
-                soup.body.append(script_tag)
+            if script_content and body is not None:
+                script_tag = lxml_html.Element('script')
+                script_tag.text = script_content
+                body.append(script_tag)
             
-            return str(soup)
+            return lxml_html.tostring(root.getroottree(), encoding='unicode')
             
         except Exception as e:
             logger.warning(f"Error reconstructing HTML: {e}")
@@ -86,49 +142,89 @@ class UniquenessTransformer:
     
     @staticmethod
     def apply_basic_transformations(html_content: str) -> str:
-        transformations = [
-            (r'class="([^"]*)"', lambda m: f'class="{m.group(1).replace(" ", "  ")}"'),
-            (r'<div>', '<div >'),
-            (r'<span>', '<span >'),
-            (r'>\s+<', '><'),
-            (r'\s{2,}', ' '),
-        ]
-        
-        result = html_content
-        for pattern, replacement in transformations:
-            if callable(replacement):
-                result = re.sub(pattern, replacement, result)
-            else:
-                result = re.sub(pattern, replacement, result)
-        
-        return result
+        return _collapse_ws(_BASIC_RE.sub(_basic_replacement, html_content))
 
     @staticmethod
     def apply_css_transformations(css_content: str) -> str:
         if not css_content or css_content.strip() == "/* No CSS content to process */":
             return css_content
         
-        transformations = [
-            (r';\s*', '; '),
-            (r'{\s*', '{ '),
-            (r'\s*}', ' }'),
-            (r',\s*', ', '),
-        ]
+        return _CSS_RE.sub(_css_replacement, css_content)
+
+    @staticmethod
+    def apply_attribute_reorder(html_content: str, rng: random.Random) -> str:
+        def reorder(match: re.Match) -> str:
+            attributes_text = match.group(2)
+            attributes = []
+            position = 0
+            for attribute in _ATTR_RE.finditer(attributes_text):
+                if attribute.start() != position:
+                    return match.group(0)
+                attributes.append(attribute.group(0).strip())
+                position = attribute.end()
+            
+            if len(attributes) < 2 or attributes_text[position:].strip():
+                return match.group(0)
+            
+            rng.shuffle(attributes)
+            return f"<{match.group(1)} {' '.join(attributes)}{match.group(3)}>"
         
-        result = css_content
-        for pattern, replacement in transformations:
-            result = re.sub(pattern, replacement, result)
+        return _TAG_ATTRS_RE.sub(reorder, html_content)
+
+    @staticmethod
+    def apply_css_property_shuffle(css_content: str, rng: random.Random) -> str:
+        def shuffle(match: re.Match) -> str:
+            body = match.group(1)
+            # Quotes, url() and comments can hide a ';', so splitting them is unsafe.
+            if '"' in body or "'" in body or 'url(' in body or '/*' in body:
+                return match.group(0)
+            
+            declarations = [declaration.strip() for declaration in body.split(';') if declaration.strip()]
+            names = [declaration.split(':', 1)[0].strip().lower() for declaration in declarations]
+            # Reordering is only safe without duplicate or shorthand/longhand overrides.
+            if len(declarations) < 2 or len(set(names)) != len(names) or not _SHUFFLE_SAFE_PROPERTIES.issuperset(names):
+                return match.group(0)
+            
+            rng.shuffle(declarations)
+            return '{ ' + '; '.join(declarations) + '; }'
         
-        return result
+        return _CSS_BLOCK_RE.sub(shuffle, css_content)
 
 
 class UniquenessNode:
-    
+    LLM_UNIQUENESS_THRESHOLD = 10000
+    LLM_CACHE_SIZE = 256
+    EMPTY_CSS_PLACEHOLDER = "/* No CSS content to process */"
+
+    SYSTEM_MESSAGE = """
+        You are an HTML/CSS uniqueness agent. Transform the provided content to make it unique while preserving functionality.
+
+        TRANSFORMATION TECHNIQUES:
+        - Reorder HTML attributes
+        - Add whitespace variations
+        - Rename CSS classes and IDs
+        - Change CSS property order
+        - Add harmless CSS comments
+        - Modify indentation patterns
+
+        GUIDELINES:
+        - Preserve all functionality
+        - Maintain visual appearance
+        - Keep brand information intact
+        - Return valid HTML and CSS
+
+        OUTPUT: JSON with html_content and css_content fields.
+        """
+
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
-        self.parser = JsonOutputParser(pydantic_object=UniquenessOutput)
         self.sanitizer = HTMLSanitizer()
         self.transformer = UniquenessTransformer()
+        self._llm_cache: OrderedDict[bytes, UniquenessOutput] = OrderedDict()
+        self.uniqueness_chain = ChatPromptTemplate.from_messages([
+            ("system", self.SYSTEM_MESSAGE),
+            ("human", "{payload}")
+        ]) | self.llm
 
     async def uniqueness_node(self, state: GraphState) -> Dict[str, Any]:
         logger.info(f"Executing uniqueness node for {state['brand_name']}")
@@ -143,10 +239,17 @@ class UniquenessNode:
 
         if not final_css:
             logger.info("No CSS content found, proceeding with HTML-only uniqueness")
-            final_css = "/* No CSS content to process */"
+            final_css = self.EMPTY_CSS_PLACEHOLDER
 
         try:
-            if len(final_html) < 10000:
+            if state.get("creative_rewrite") and len(final_html) < self.LLM_UNIQUENESS_THRESHOLD:
+                pending = state.get("pending_uniqueness")
+                if (
+                    pending 
+                    and pending.get("source_html") == final_html 
+                    and pending.get("source_css") == final_css
+                ):
+                    return self._apply_pending_uniqueness(state, final_html, final_css, pending)
                 return await self._apply_llm_uniqueness(state, final_html, final_css)
             else:
                 return self._apply_rule_based_uniqueness(state, final_html, final_css)
@@ -156,37 +259,13 @@ class UniquenessNode:
             logger.error(error_msg, exc_info=True)
             return self._create_error_response(state, error_msg)
 
-    async def _apply_llm_uniqueness(
-        self, 
-        state: GraphState, 
-        html_content: str, 
+    @staticmethod
+    def build_content_summary(
+        spec_data: WhitePageSpec, 
+        safe_content: Mapping[str, Any], 
         css_content: str
-    ) -> Dict[str, Any]:
-        
-        safe_content = self.sanitizer.extract_safe_content(html_content)
-        
-        system_message = """
-        You are an HTML/CSS uniqueness agent. Transform the provided content to make it unique while preserving functionality.
-
-        TRANSFORMATION TECHNIQUES:
-        - Reorder HTML attributes
-        - Add whitespace variations
-        - Rename CSS classes and IDs
-        - Change CSS property order
-        - Add harmless CSS comments
-        - Modify indentation patterns
-
-        GUIDELINES:
-        - Preserve all functionality
-        - Maintain visual appearance
-        - Keep brand information intact
-        - Return valid HTML and CSS
-
-        OUTPUT: JSON with html_content and css_content fields.
-        """
-
-        spec_data = state["spec"]
-        content_summary = f"""
+    ) -> str:
+        return f"""
         Transform this content for uniqueness:
 
         Brand: {spec_data.brand_name}
@@ -206,17 +285,68 @@ class UniquenessNode:
         Apply uniqueness transformations while preserving brand "{spec_data.brand_name}" and contact information.
         """
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_message),
-            ("human", content_summary)
-        ])
-        
-        chain = prompt | self.llm | self.parser
-        uniqueness_output = await chain.ainvoke({})
+    async def _apply_llm_uniqueness(
+        self, 
+        state: GraphState, 
+        html_content: str, 
+        css_content: str
+    ) -> Dict[str, Any]:
         
-        unique_html = uniqueness_output.html_content
-        unique_css = uniqueness_output.css_content
+        safe_content = self.sanitizer.extract_safe_content(html_content)
+        content_summary = self.build_content_summary(state["spec"], safe_content, css_content)
 
+        cache_key = hashlib.blake2b(content_summary.encode("utf-8"), digest_size=16).digest()
+        uniqueness_output = self._llm_cache.get(cache_key)
+        
+        if uniqueness_output is not None:
+            logger.info("Reusing cached LLM uniqueness output")
+            self._llm_cache.move_to_end(cache_key)
+        else:
+            message = await self.uniqueness_chain.ainvoke({"payload": content_summary})
+            uniqueness_output = UniquenessOutput(**orjson.loads(clean_llm_json_output(message.content)))
+            self._llm_cache[cache_key] = uniqueness_output
+            if len(self._llm_cache) > self.LLM_CACHE_SIZE:
+                self._llm_cache.popitem(last=False)
+        
+        return self._finalize_llm_output(
+            state, 
+            html_content, 
+            css_content, 
+            safe_content, 
+            uniqueness_output.html_content, 
+            uniqueness_output.css_content
+        )
+
+    def _apply_pending_uniqueness(
+        self, 
+        state: GraphState, 
+        html_content: str, 
+        css_content: str, 
+        pending: Dict[str, str]
+    ) -> Dict[str, Any]:
+        
+        logger.info("Using uniqueness output from the combined validation call")
+        safe_content = self.sanitizer.extract_safe_content(html_content)
+        
+        return self._finalize_llm_output(
+            state, 
+            html_content, 
+            css_content, 
+            safe_content, 
+            pending["html_content"], 
+            pending["css_content"]
+        )
+
+    def _finalize_llm_output(
+        self, 
+        state: GraphState, 
+        html_content: str, 
+        css_content: str, 
+        safe_content: Mapping[str, Any], 
+        unique_html: str, 
+        unique_css: str
+    ) -> Dict[str, Any]:
+        
         if not unique_html.strip() or len(unique_html) < len(html_content) * 0.5:
             logger.warning("LLM output seems incomplete, applying rule-based fallback")
             return self._apply_rule_based_uniqueness(state, html_content, css_content)
@@ -239,8 +369,13 @@ class UniquenessNode:
         
         logger.info("Applying rule-based uniqueness transformations")
         
-        unique_html = self.transformer.apply_basic_transformations(html_content)
-        unique_css = self.transformer.apply_css_transformations(css_content)
+        rng = random.Random(zlib.crc32(state["spec"].brand_name.encode("utf-8")))
+        unique_html = self.transformer.apply_basic_transformations(
+            self.transformer.apply_attribute_reorder(html_content, rng)
+        )
+        unique_css = self.transformer.apply_css_transformations(
+            self.transformer.apply_css_property_shuffle(css_content, rng)
+        )
         
         return self._create_success_response(state, unique_html, unique_css)
 
@@ -252,18 +387,17 @@ class UniquenessNode:
     ) -> Dict[str, Any]:
         
         return {
-            **state,
             "final_html": html_content,
             "final_css": css_content,
-            "messages": state.get("messages", []) + [
+            "pending_uniqueness": None,
+            "messages": [
                 {"type": "info", "step": "uniqueness", "message": "Uniqueness applied successfully"}
             ]
         }
 
     def _create_error_response(self, state: GraphState, error_msg: str) -> Dict[str, Any]:
         return {
-            **state,
-            "messages": state.get("messages", []) + [
+            "messages": [
                 {"type": "error", "step": "uniqueness", "message": error_msg}
             ]
         }
\ No newline at end of file
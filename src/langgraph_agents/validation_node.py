@@ -1,22 +1,54 @@
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Mapping, Optional, List, Sequence, Tuple, Union
+from types import MappingProxyType
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import chain, islice
+import hashlib
 import logging
 import re
 
+import orjson
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from langchain_openai import ChatOpenAI
 from pydantic import ValidationError
 
 from src.models.pydantic_models import WhitePageSpec, ValidationResult
-from src.langgraph_agents.state import GraphState
+from src.langgraph_agents.state import GraphState, GenerationMetrics
+from src.langgraph_agents.content_node import clean_llm_json_output
+from src.langgraph_agents.uniqueness_node import HTMLSanitizer, UniquenessNode
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+_CRITICAL_ERROR_RE = re.compile(r'corrupt|malformed|invalid syntax|broken', re.IGNORECASE)
+_MINOR_ERROR_RE = re.compile(r'contact|brand|email|phone|title|alt', re.IGNORECASE)
+
 
 class ValidationDecisionMaker:
     CRITICAL_THRESHOLD = 0.5
     ACCEPTABLE_THRESHOLD = 0.7
+    HEURISTIC_PASS_THRESHOLD = 0.85
+
+    @staticmethod
+    def heuristic_score(
+        spec_data: WhitePageSpec, 
+        html_content: str, 
+        html_analysis: Mapping[str, Any]
+    ) -> float:
+        score = 0.0
+
+        if html_analysis['has_doctype']:
+            score += 0.25
+        if html_analysis['has_basic_structure']:
+            score += 0.25
+        if spec_data.brand_name and spec_data.brand_name.lower() in html_analysis['title'].lower():
+            score += 0.2
+        if spec_data.contact_email and spec_data.contact_email.lower() in html_analysis['text_content'].lower():
+            score += 0.15
+        if spec_data.contact_phone and spec_data.contact_phone in html_content:
+            score += 0.15
+
+        return round(score, 2)
 
     @classmethod
     def should_apply_targeted_fixes(cls, validation_result: ValidationResult) -> bool:
@@ -29,85 +61,203 @@ class ValidationDecisionMaker:
         if score < cls.CRITICAL_THRESHOLD and error_count > 8:
             return False
 
-        critical_errors = [
-            error for error in validation_result.errors
-            if any(keyword in error.lower() for keyword in ['corrupt', 'malformed', 'invalid syntax', 'broken'])
-        ]
-
-        minor_errors = [
-            error for error in validation_result.errors
-            if any(keyword in error.lower() for keyword in ['contact', 'brand', 'email', 'phone', 'title', 'alt'])
-        ]
-
-        return len(critical_errors) <= 2 and (len(minor_errors) >= len(validation_result.errors) * 0.6)
+        minor_threshold = error_count * 0.6
+        critical_count = 0
+        minor_count = 0
+
+        for remaining, error in enumerate(validation_result.errors, start=1):
+            if _CRITICAL_ERROR_RE.search(error):
+                critical_count += 1
+                if critical_count > 2:
+                    return False
+            if _MINOR_ERROR_RE.search(error):
+                minor_count += 1
+            elif minor_count + error_count - remaining < minor_threshold:
+                return False
+
+        return minor_count >= minor_threshold
+
+
+_STRUCTURE_TAG_RE = re.compile(r'<(html|head|body)[\s>]', re.IGNORECASE)
+_DOCTYPE_RE = re.compile(r'\s*<!doctype', re.IGNORECASE)
+
+
+class _ContentInfoCollector:
+    TEXT_LIMIT = 2000
+    HEADINGS_PER_LEVEL = 3
+    HEADING_LIMIT = 5
+    LINK_LIMIT = 5
+    IMAGE_LIMIT = 3
+    HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.meta_description = ''
+        self.headings: Dict[str, List[str]] = {tag: [] for tag in self.HEADING_TAGS}
+        self.links_info: List[str] = []
+        self.images_info: List[str] = []
+        self._text: List[str] = []
+        self._text_length = 0
+        self._skip_depth = 0
+        self._captures: List[List[Any]] = []
+        self._open_headings = {tag: 0 for tag in self.HEADING_TAGS}
+        self._open_links = 0
+
+    @property
+    def text_content(self) -> str:
+        return ''.join(self._text)[:self.TEXT_LIMIT]
+
+    @property
+    def done(self) -> bool:
+        return (
+            self.title is not None
+            and self._text_length >= self.TEXT_LIMIT
+            and len(self.links_info) >= self.LINK_LIMIT
+            and len(self.images_info) >= self.IMAGE_LIMIT
+            and self._headings_done()
+        )
+
+    @property
+    def heading_texts(self) -> List[str]:
+        return list(islice(chain.from_iterable(self.headings.values()), self.HEADING_LIMIT))
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag in ('style', 'script'):
+            self._skip_depth += 1
+        elif tag == 'title' and self.title is None:
+            self._captures.append([tag, []])
+        elif tag in self._open_headings:
+            if len(self.headings[tag]) + self._open_headings[tag] < self.HEADINGS_PER_LEVEL:
+                self._open_headings[tag] += 1
+                self._captures.append([tag, []])
+        elif tag == 'a' and 'href' in attrib:
+            if len(self.links_info) + self._open_links < self.LINK_LIMIT:
+                self._open_links += 1
+                self._captures.append([tag, [], attrib['href']])
+        elif tag == 'img' and len(self.images_info) < self.IMAGE_LIMIT:
+            self.images_info.append(f"Source: {attrib.get('src', '')}, Alt: {attrib.get('alt', '')}")
+        elif tag == 'meta' and not self.meta_description and attrib.get('name') == 'description':
+            self.meta_description = attrib.get('content', '')
+
+    def end(self, tag: str) -> None:
+        if tag in ('style', 'script'):
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+
+        for i in range(len(self._captures) - 1, -1, -1):
+            if self._captures[i][0] == tag:
+                capture = self._captures.pop(i)
+                self._finish_capture(capture)
+                break
+
+    def data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        for capture in self._captures:
+            capture[1].append(data)
+        if self._text_length < self.TEXT_LIMIT:
+            self._text.append(data)
+            self._text_length += len(data)
+
+    def close(self) -> '_ContentInfoCollector':
+        while self._captures:
+            self._finish_capture(self._captures.pop())
+        return self
+
+    def _headings_done(self) -> bool:
+        # Only the first HEADING_LIMIT headings in level order are reported, so
+        # later levels stop mattering once the earlier ones have filled them.
+        remaining = self.HEADING_LIMIT
+        for tag in self.HEADING_TAGS:
+            needed = min(self.HEADINGS_PER_LEVEL, remaining)
+            if len(self.headings[tag]) < needed:
+                return False
+            remaining -= needed
+            if not remaining:
+                return True
+        return True
+
+    def _finish_capture(self, capture: List[Any]) -> None:
+        tag, parts = capture[0], capture[1]
+        text = ''.join(parts)
+        if tag == 'title':
+            self.title = text
+        elif tag == 'a':
+            self._open_links -= 1
+            self.links_info.append(f"Text: {text.strip()}, URL: {capture[2]}")
+        else:
+            self._open_headings[tag] -= 1
+            self.headings[tag].append(text.strip())
 
 
 class HTMLAnalyzer:
+    FEED_SIZE = 16384
+    MAX_PARSE_CHARS = 200_000
+
     @staticmethod
-    def extract_content_info(html_content: str) -> Dict[str, Any]:
+    @lru_cache(maxsize=8)
+    def extract_content_info(html_content: str) -> Mapping[str, Any]:
+        # The result is cached and shared between callers, so it is handed out read-only
         try:
-            from bs4 import BeautifulSoup
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            for tag in soup(['style', 'script']):
-                tag.decompose()
-            
-            analysis = {
-                'title': soup.find('title').get_text() if soup.find('title') else "No title",
-                'meta_description': '',
-                'headings': [],
-                'links_info': [],
-                'images_info': [],
-                'text_content': soup.get_text()[:2000],
-                'has_doctype': html_content.strip().lower().startswith('<!doctype'),
-                'has_basic_structure': bool(soup.find('html') and soup.find('head') and soup.find('body'))
-            }
+            from lxml import etree
             
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc:
-                analysis['meta_description'] = meta_desc.get('content', '')
+            collector = _ContentInfoCollector()
+            parser = etree.HTMLParser(target=collector)
+            source = html_content[:HTMLAnalyzer.MAX_PARSE_CHARS]
+            for offset in range(0, len(source), HTMLAnalyzer.FEED_SIZE):
+                parser.feed(source[offset:offset + HTMLAnalyzer.FEED_SIZE])
+                if collector.done:
+                    break
+            parser.close()
             
-            for i in range(1, 7):
-                headings = soup.find_all(f'h{i}')
-                for h in headings[:3]:
-                    analysis['headings'].append(h.get_text().strip())
-            
-            links = soup.find_all('a', href=True)
-            for link in links[:5]:
-                link_text = link.get_text().strip()
-                link_href = link['href']
-                analysis['links_info'].append(f"Text: {link_text}, URL: {link_href}")
-            
-            images = soup.find_all('img')
-            for img in images[:3]:
-                img_src = img.get('src', '')
-                img_alt = img.get('alt', '')
-                analysis['images_info'].append(f"Source: {img_src}, Alt: {img_alt}")
-            
-            return analysis
+            return MappingProxyType({
+                'title': collector.title if collector.title is not None else "No title",
+                'meta_description': collector.meta_description,
+                'headings': tuple(collector.heading_texts),
+                'links_info': tuple(collector.links_info),
+                'images_info': tuple(collector.images_info),
+                'text_content': collector.text_content,
+                'has_doctype': _DOCTYPE_RE.match(html_content) is not None,
+                'has_basic_structure': HTMLAnalyzer._has_basic_structure(html_content)
+            })
             
         except Exception as e:
             logger.warning(f"Error extracting HTML content: {e}")
-            return {
+            return MappingProxyType({
                 'title': "Error extracting title",
                 'meta_description': '',
-                'headings': [],
-                'links_info': [],
-                'images_info': [],
+                'headings': (),
+                'links_info': (),
+                'images_info': (),
                 'text_content': html_content[:1000] if html_content else '',
                 'has_doctype': False,
                 'has_basic_structure': False
-            }
+            })
 
     @staticmethod
-    def format_list_for_prompt(items: List[str]) -> str:
+    def _has_basic_structure(html_content: str) -> bool:
+        found = set()
+        for match in _STRUCTURE_TAG_RE.finditer(html_content):
+            found.add(match.group(1).lower())
+            if len(found) == 3:
+                return True
+        return False
+
+    @staticmethod
+    def format_list_for_prompt(items: Sequence[str]) -> str:
         if not items:
             return "None"
         return " | ".join(items[:5])
 
 
 class ValidationResultParser:
+    FALLBACK_WARNING = "Response parsing issue - using fallback validation"
+
+    @staticmethod
+    def parse_llm_response(message: Any) -> Any:
+        content = getattr(message, "content", message)
+        return orjson.loads(clean_llm_json_output(content))
+
     @staticmethod
     def create_validation_result(response: Union[Dict[str, Any], ValidationResult]) -> ValidationResult:
         if isinstance(response, ValidationResult):
@@ -118,59 +268,72 @@ class ValidationResultParser:
             return ValidationResult(
                 is_valid=False,
                 errors=[f"Unexpected response type: {type(response)}"],
-                warnings=[],
+                warnings=[ValidationResultParser.FALLBACK_WARNING],
                 score=0.0
             )
         
+        payload = response.get('ValidationResult', response)
         try:
-            if 'ValidationResult' in response:
-                validation_data = response['ValidationResult']
-            else:
-                validation_data = response
+            if not isinstance(payload, dict):
+                raise TypeError(f"ValidationResult payload is {type(payload).__name__}, expected object")
+            return ValidationResult.model_validate(payload)
             
-            normalized_data = {
-                'is_valid': bool(validation_data.get('is_valid', False)),
-                'errors': validation_data.get('errors', []),
-                'warnings': validation_data.get('warnings', []),
-                'score': float(validation_data.get('score', 0.0))
-            }
-            
-            if not isinstance(normalized_data['errors'], list):
-                normalized_data['errors'] = [str(normalized_data['errors'])]
-            
-            if not isinstance(normalized_data['warnings'], list):
-                normalized_data['warnings'] = [str(normalized_data['warnings'])]
-            
-            return ValidationResult(**normalized_data)
-            
-        except (KeyError, TypeError, ValueError, ValidationError) as e:
+        except (ValidationError, AttributeError, TypeError) as e:
             logger.warning(f"Failed to create ValidationResult from response: {e}")
             logger.debug(f"Response structure: {response}")
             
             fallback_score = 0.0
             try:
-                if isinstance(response, dict):
-                    if 'ValidationResult' in response and 'score' in response['ValidationResult']:
-                        fallback_score = float(response['ValidationResult']['score'])
-                    elif 'score' in response:
-                        fallback_score = float(response['score'])
+                if isinstance(payload, dict) and 'score' in payload:
+                    fallback_score = float(payload['score'])
+                elif 'score' in response:
+                    fallback_score = float(response['score'])
             except (ValueError, TypeError):
                 pass
             
             return ValidationResult(
                 is_valid=fallback_score >= 0.7,
                 errors=[f"Failed to parse validation response: {str(e)}"],
-                warnings=["Response parsing issue - using fallback validation"],
+                warnings=[ValidationResultParser.FALLBACK_WARNING],
                 score=fallback_score
             )
 
 
 class ValidationNode:
+    LLM_CACHE_SIZE = 256
+    MAX_TARGETED_FIX_ATTEMPTS = 2
+    SYSTEM_MESSAGE = """
+        You are an HTML validation expert. Analyze the provided HTML structure and content information 
+        against the WhitePage specification to assess validity, quality, and compliance.
+
+        VALIDATION CRITERIA:
+        1. HTML Structure: Complete HTML5 document with doctype, html, head, body elements
+        2. Content Relevance: Content should align with brand, business description, and products
+        3. Uniqueness: Minimal use of generic placeholders or repetitive phrases
+        4. Contact Information: Valid and authentic contact information
+        5. Content Quality: Appropriate for business type and target audience
+        6. Technical Compliance: Proper semantic structure and best practices
+
+        OUTPUT FORMAT:
+        Return JSON with these specific fields:
+        - is_valid: boolean value (true if score >= 0.7)
+        - errors: array of specific error descriptions
+        - warnings: array of warning descriptions
+        - score: float between 0.0 and 1.0 (0.7+ considered acceptable)
+
+        Do not wrap the JSON in any additional structure or markdown.
+        """
+
     def __init__(self, llm: ChatOpenAI):
         self.llm = llm
-        self.parser = JsonOutputParser(pydantic_object=ValidationResult)
         self.html_analyzer = HTMLAnalyzer()
         self.result_parser = ValidationResultParser()
+        self._llm_cache: OrderedDict[bytes, ValidationResult] = OrderedDict()
+        self.validation_chain = ChatPromptTemplate.from_messages([
+            ("system", self.SYSTEM_MESSAGE),
+            ("human", "{payload}")
+        ]) | self.llm
+        self.combined_chain = self._create_combined_prompt() | self.llm
 
     async def validation_node(self, state: GraphState) -> Dict[str, Any]:
         logger.info(f"Executing validation node for {state['brand_name']}")
@@ -182,11 +345,10 @@ class ValidationNode:
             validation_result = ValidationResult(is_valid=False, errors=[error_msg], score=0.0)
             
             return {
-                **state,
                 "final_validation": validation_result,
                 "should_retry_pipeline": True,
                 "should_apply_targeted_fixes": False,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "validation", "message": error_msg}
                 ]
             }
@@ -194,98 +356,58 @@ class ValidationNode:
         try:
             html_analysis = self.html_analyzer.extract_content_info(final_html)
             spec_data = state["spec"]
-            
-            system_message = """
-            You are an HTML validation expert. Analyze the provided HTML structure and content information 
-            against the WhitePage specification to assess validity, quality, and compliance.
-
-            VALIDATION CRITERIA:
-            1. HTML Structure: Complete HTML5 document with doctype, html, head, body elements
-            2. Content Relevance: Content should align with brand, business description, and products
-            3. Uniqueness: Minimal use of generic placeholders or repetitive phrases
-            4. Contact Information: Valid and authentic contact information
-            5. Content Quality: Appropriate for business type and target audience
-            6. Technical Compliance: Proper semantic structure and best practices
-
-            OUTPUT FORMAT:
-            Return JSON with these specific fields:
-            - is_valid: boolean value (true if score >= 0.7)
-            - errors: array of specific error descriptions
-            - warnings: array of warning descriptions
-            - score: float between 0.0 and 1.0 (0.7+ considered acceptable)
-
-            Do not wrap the JSON in any additional structure or markdown.
-            """
-
-            products_text = " | ".join(spec_data.products) if spec_data.products else "None specified"
-            headings_text = self.html_analyzer.format_list_for_prompt(html_analysis['headings'])
-            links_text = self.html_analyzer.format_list_for_prompt(html_analysis['links_info'])
-            images_text = self.html_analyzer.format_list_for_prompt(html_analysis['images_info'])
-
-            validation_data = f"""
-            VALIDATION SPECIFICATION:
-            Brand Name: {spec_data.brand_name}
-            Business: {spec_data.business_description}
-            Expected Email: {spec_data.contact_email}
-            Expected Phone: {spec_data.contact_phone}
-            Expected Address: {spec_data.address}
-            Page Type: {spec_data.page_type.value if spec_data.page_type else 'general'}
-            Expected Products: {products_text}
-
-            HTML ANALYSIS RESULTS:
-            Document Title: {html_analysis['title']}
-            Meta Description: {html_analysis['meta_description']}
-            Has DOCTYPE: {html_analysis['has_doctype']}
-            Has Basic Structure: {html_analysis['has_basic_structure']}
-            Main Headings: {headings_text}
-            Links Found: {links_text}
-            Images Info: {images_text}
-
-            TEXT CONTENT SAMPLE:
-            {html_analysis['text_content']}
-
-            VALIDATION TASKS:
-            1. Check if brand name "{spec_data.brand_name}" appears in title and content
-            2. Verify contact information alignment: {spec_data.contact_email}, {spec_data.contact_phone}
-            3. Assess HTML structure completeness (DOCTYPE, html, head, body)
-
-            Return validation results in JSON format with the specified fields.
-            """
-
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_message),
-                ("human", validation_data)
-            ])
-            
-            chain = prompt | self.llm | self.parser
-            response = await chain.ainvoke({})
-            
-            validation_result = self.result_parser.create_validation_result(response)
+
+            heuristic_score = ValidationDecisionMaker.heuristic_score(spec_data, final_html, html_analysis)
+            pending_uniqueness = None
+
+            if heuristic_score >= ValidationDecisionMaker.HEURISTIC_PASS_THRESHOLD:
+                logger.info(f"Heuristic validation score {heuristic_score:.2f}, skipping LLM validation")
+                validation_result = ValidationResult(is_valid=True, score=heuristic_score)
+            elif not html_analysis['has_doctype'] and not html_analysis['has_basic_structure']:
+                logger.info("Page has no DOCTYPE or html/head/body structure, skipping LLM validation")
+                validation_result = ValidationResult(
+                    is_valid=False,
+                    errors=[
+                        "Missing DOCTYPE declaration",
+                        "Missing basic HTML structure (html, head, body)"
+                    ],
+                    score=heuristic_score
+                )
+            else:
+                validation_result, pending_uniqueness = await self._validate_with_llm(
+                    state, spec_data, final_html, html_analysis
+                )
             
             score = validation_result.score
-            metrics = state.get("metrics", {})
+            metrics = state.setdefault("metrics", GenerationMetrics())
             metrics["validation_score"] = score
 
             should_apply_fixes = False
             should_retry = False
             should_proceed = False
+            fix_attempts = state.get("targeted_fix_attempts", 0)
 
             if not validation_result.is_valid:
-                if ValidationDecisionMaker.should_apply_targeted_fixes(validation_result):
+                if fix_attempts >= self.MAX_TARGETED_FIX_ATTEMPTS:
+                    logger.warning(f"Targeted fixes exhausted after {fix_attempts} attempts, not fixing again")
+                    should_retry = True
+                elif ValidationDecisionMaker.should_apply_targeted_fixes(validation_result):
                     should_apply_fixes = True
+                    fix_attempts += 1
                 else:
                     should_retry = True
             else:
                 should_proceed = True
 
             return {
-                **state,
                 "final_validation": validation_result,
+                "pending_uniqueness": pending_uniqueness,
                 "metrics": metrics,
+                "targeted_fix_attempts": fix_attempts,
                 "should_apply_targeted_fixes": should_apply_fixes,
                 "should_retry_pipeline": should_retry,
                 "should_proceed_to_uniqueness": should_proceed,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "info", "step": "validation", 
                      "message": f"Validation completed. Valid: {validation_result.is_valid}, Score: {score:.2f}"}
                 ]
@@ -297,11 +419,139 @@ class ValidationNode:
             validation_result = ValidationResult(is_valid=False, errors=[error_msg], score=0.0)
             
             return {
-                **state,
                 "final_validation": validation_result,
                 "should_retry_pipeline": True,
                 "should_apply_targeted_fixes": False,
-                "messages": state.get("messages", []) + [
+                "messages": [
                     {"type": "error", "step": "validation", "message": error_msg}
                 ]
-            }
\ No newline at end of file
+            }
+
+    async def _validate_with_llm(
+        self,
+        state: GraphState,
+        spec_data: WhitePageSpec,
+        html_content: str,
+        html_analysis: Mapping[str, Any]
+    ) -> Tuple[ValidationResult, Optional[Dict[str, str]]]:
+        products_text = " | ".join(spec_data.products) if spec_data.products else "None specified"
+        headings_text = self.html_analyzer.format_list_for_prompt(html_analysis['headings'])
+        links_text = self.html_analyzer.format_list_for_prompt(html_analysis['links_info'])
+        images_text = self.html_analyzer.format_list_for_prompt(html_analysis['images_info'])
+
+        validation_data = f"""
+        VALIDATION SPECIFICATION:
+        Brand Name: {spec_data.brand_name}
+        Business: {spec_data.business_description}
+        Expected Email: {spec_data.contact_email}
+        Expected Phone: {spec_data.contact_phone}
+        Expected Address: {spec_data.address}
+        Page Type: {spec_data.page_type.value if spec_data.page_type else 'general'}
+        Expected Products: {products_text}
+
+        HTML ANALYSIS RESULTS:
+        Document Title: {html_analysis['title']}
+        Meta Description: {html_analysis['meta_description']}
+        Has DOCTYPE: {html_analysis['has_doctype']}
+        Has Basic Structure: {html_analysis['has_basic_structure']}
+        Main Headings: {headings_text}
+        Links Found: {links_text}
+        Images Info: {images_text}
+
+        VALIDATION TASKS:
+        1. Check if brand name "{spec_data.brand_name}" appears in title and content
+        2. Verify contact information alignment: {spec_data.contact_email}, {spec_data.contact_phone}
+        3. Assess HTML structure completeness (DOCTYPE, html, head, body)
+
+        Return validation results in JSON format with the specified fields.
+
+        TEXT CONTENT SAMPLE:
+        {html_analysis['text_content']}
+        """
+
+        cache_key = hashlib.blake2b(validation_data.encode("utf-8"), digest_size=16).digest()
+        cached_result = self._llm_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info("Reusing cached LLM validation result")
+            self._llm_cache.move_to_end(cache_key)
+            return cached_result, None
+
+        final_css = state.get("final_css") or UniquenessNode.EMPTY_CSS_PLACEHOLDER
+        pending_uniqueness = None
+
+        if state.get("creative_rewrite") and len(html_content) < UniquenessNode.LLM_UNIQUENESS_THRESHOLD:
+            response, pending_uniqueness = await self._validate_with_uniqueness(
+                spec_data, html_content, final_css, validation_data
+            )
+        else:
+            message = await self.validation_chain.ainvoke({"payload": validation_data})
+            response = self.result_parser.parse_llm_response(message)
+        
+        validation_result = self.result_parser.create_validation_result(response)
+
+        if ValidationResultParser.FALLBACK_WARNING not in validation_result.warnings:
+            self._llm_cache[cache_key] = validation_result
+            if len(self._llm_cache) > self.LLM_CACHE_SIZE:
+                self._llm_cache.popitem(last=False)
+
+        return validation_result, pending_uniqueness
+
+    async def _validate_with_uniqueness(
+        self,
+        spec_data: WhitePageSpec,
+        html_content: str,
+        css_content: str,
+        validation_request: str
+    ) -> Tuple[Any, Optional[Dict[str, str]]]:
+        safe_content = HTMLSanitizer.extract_safe_content(html_content)
+        uniqueness_request = UniquenessNode.build_content_summary(spec_data, safe_content, css_content)
+
+        message = await self.combined_chain.ainvoke({
+            "uniqueness_system": UniquenessNode.SYSTEM_MESSAGE,
+            "validation_system": self.SYSTEM_MESSAGE,
+            "uniqueness_request": uniqueness_request,
+            "validation_request": validation_request
+        })
+        response = self.result_parser.parse_llm_response(message)
+
+        if not isinstance(response, dict):
+            return response, None
+
+        pending_uniqueness = None
+        uniqueness = response.get("uniqueness")
+        if isinstance(uniqueness, dict) and uniqueness.get("html_content"):
+            pending_uniqueness = {
+                "source_html": html_content,
+                "source_css": css_content,
+                "html_content": uniqueness["html_content"],
+                "css_content": uniqueness.get("css_content", "")
+            }
+
+        return response.get("validation", response), pending_uniqueness
+
+    @staticmethod
+    def _create_combined_prompt() -> ChatPromptTemplate:
+        return ChatPromptTemplate.from_messages([
+            ("system", """
+            You perform two tasks on the same document in one response.
+
+            TASK 1 - UNIQUENESS:
+            {uniqueness_system}
+
+            TASK 2 - VALIDATION of the ORIGINAL HTML (before any TASK 1 changes):
+            {validation_system}
+
+            COMBINED OUTPUT (overrides the output instructions above):
+            Return a single JSON object with exactly two keys:
+            - uniqueness: object with html_content and css_content from TASK 1
+            - validation: object with is_valid, errors, warnings and score from TASK 2
+            Do not wrap the JSON in markdown.
+            """),
+            ("human", """
+            TASK 1 INPUT:
+            {uniqueness_request}
+
+            TASK 2 INPUT:
+            {validation_request}
+            """)
+        ])
@@ -1,4 +1,5 @@
 import os
+import threading
 import httpx
 from openai import AsyncOpenAI
 from typing import Optional
@@ -10,6 +11,7 @@ logger = logging.getLogger(__name__)
 class OpenAIClientManager:
     _instance: Optional['OpenAIClientManager'] = None
     _client: Optional[AsyncOpenAI] = None
+    _client_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -38,24 +40,35 @@ class OpenAIClientManager:
     def get_client(self) -> AsyncOpenAI:
         """Returns the OpenAI client, initializing it if necessary."""
         if self._client is None:
-            logger.info("Initializing AsyncOpenAI client...")
-            http_client_kwargs = {}
-            proxy_url = self._get_proxy_url()
+            # Double-checked so concurrent first calls build a single httpx.AsyncClient
+            with self._client_lock:
+                if self._client is None:
+                    logger.info("Initializing AsyncOpenAI client...")
+                    http_client_kwargs = {}
+                    proxy_url = self._get_proxy_url()
 
-            if proxy_url:
-                http_client_kwargs["proxy"] = proxy_url
-                self._set_proxy_env_vars(proxy_url)
+                    if proxy_url:
+                        http_client_kwargs["proxy"] = proxy_url
+                        self._set_proxy_env_vars(proxy_url)
 
-            try:
-                self._client = AsyncOpenAI(
-                    api_key=settings.openai_api_key,
-                    base_url="https://api.openai.com/v1",
-                    http_client=httpx.AsyncClient(**http_client_kwargs)
-                )
-                logger.info("AsyncOpenAI client initialized.")
-            except Exception as e:
-                logger.critical(f"Failed to initialize AsyncOpenAI client: {e}")
-                raise
+                    try:
+                        self._client = AsyncOpenAI(
+                            api_key=settings.openai_api_key,
+                            base_url="https://api.openai.com/v1",
+                            http_client=httpx.AsyncClient(
+                                http2=True,
+                                limits=httpx.Limits(
+                                    max_connections=200,
+                                    max_keepalive_connections=100,
+                                    keepalive_expiry=30.0
+                                ),
+                                **http_client_kwargs
+                            )
+                        )
+                        logger.info("AsyncOpenAI client initialized.")
+                    except Exception as e:
+                        logger.critical(f"Failed to initialize AsyncOpenAI client: {e}")
+                        raise
         return self._client
 
     async def close(self) -> None:
@@ -69,8 +82,5 @@ class OpenAIClientManager:
             finally:
                 self._client = None
 
-# Singleton instance of OpenAIClientManager
-openai_client_manager = OpenAIClientManager()
-
-# Export the OpenAI client for use in other modules
-openai_client: AsyncOpenAI = openai_client_manager.get_client()
\ No newline at end of file
+# Singleton instance of OpenAIClientManager; the client itself is created on first get_client()
+openai_client_manager = OpenAIClientManager()
\ No newline at end of file
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 
 class PageTypeEnum(str, Enum):
     ECOMMERCE = "ecommerce"
@@ -22,8 +23,10 @@ class WhitePageSpec(BaseModel):
     products: Optional[List[str]] = Field(None, description="Список товаров")
     geo_location: str = Field("USA", description="Географическое расположение")
     page_description: Optional[str] = Field(None, description="Текстовое описание желаемого вида и содержания страницы")
+    creative_rewrite: bool = Field(False, description="Переписывать страницу через LLM на этапе уникализации")
 
-    @validator('page_name')
+    @field_validator('page_name')
+    @classmethod
     def validate_page_name(cls, v):
         if not v or not v.strip():
             raise ValueError('page_name cannot be empty')
@@ -36,6 +39,10 @@ class FullPageTemplate(BaseModel):
     description: str = Field(..., description="Текстовое описание шаблона для поиска")
     tags: List[str] = Field(default_factory=list, description="Теги для поиска и категоризации шаблона")
 
+    @cached_property
+    def search_text(self) -> str:
+        return f"{self.description} {' '.join(self.tags)}".lower()
+
 class GeneratedContent(BaseModel):
     main_content: Optional[Dict[str, str]] = Field(
         default=None,
@@ -68,6 +75,14 @@ class ValidationResult(BaseModel):
     warnings: List[str] = Field(default_factory=list, description="Предупреждения")
     score: float = Field(0.0, description="Оценка качества страницы")
 
+    @field_validator('errors', 'warnings', mode='before')
+    @classmethod
+    def wrap_single_message(cls, v):
+        # LLM replies sometimes return a single message instead of a list
+        if isinstance(v, str):
+            return [v]
+        return v
+
 class GeneratedWhitePage(BaseModel):
     html: str = Field(..., description="Сгенерированный HTML")
     css: str = Field("", description="CSS стили")
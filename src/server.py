@@ -1,16 +1,17 @@
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from contextlib import asynccontextmanager
-from src.models.pydantic_models import WhitePageRequest, WhitePageResponse
+from src.models.pydantic_models import WhitePageRequest, WhitePageResponse, GeneratedWhitePage
 from src.utils.logging import get_logger
 from src.config.settings import settings
-from typing import Optional
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
 import os
 import asyncio
 from pathlib import Path
 import re
-import aiofiles
 import time
 
 from src.tools.template_loader import TemplateLoader
@@ -24,20 +25,39 @@ orchestrator_graph: Optional[WhitePageOrchestratorGraph] = None
 
 GENERATION_DIR = Path("generation")
 
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w\-.]')
+
+PREVIEW_CACHE_SIZE = 128
+_preview_cache: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+
 def ensure_generation_directory() -> None:
     GENERATION_DIR.mkdir(exist_ok=True)
     logger.info(f"Ensured generation directory exists: {GENERATION_DIR.absolute()}")
 
+@lru_cache(maxsize=1024)
 def sanitize_filename(filename: str) -> str:
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    sanitized = re.sub(r'[^\\w\\-_.]', '_', sanitized)
-    sanitized = sanitized.strip('._')
+    r"""
+    Keeps word characters, '-' and '.'; everything else becomes '_'.
+
+    >>> sanitize_filename("My Page-2.v1")
+    'My_Page-2.v1'
+    >>> sanitize_filename("../etc/passwd")
+    'etc_passwd'
+    >>> sanitize_filename('a<b>:"c"|d?*')
+    'a_b___c__d'
+    >>> sanitize_filename("...")
+    'page'
+    """
+    sanitized = _UNSAFE_FILENAME_RE.sub('_', filename).strip('._')
 
     if not sanitized:
         return "page"
 
     return sanitized[:100]
 
+async def write_text_file(path: Path, content: str) -> None:
+    await asyncio.to_thread(path.write_text, content, encoding='utf-8')
+
 async def save_generated_page(page_name: str, html_content: str, css_content: str) -> str:
     ensure_generation_directory()
 
@@ -52,14 +72,15 @@ async def save_generated_page(page_name: str, html_content: str, css_content: st
     logger.info(f"CSS content length: {len(css_content)}")
 
     try:
-        if css_content.strip():
-            async with aiofiles.open(css_file_path, 'w', encoding='utf-8') as css_file:
-                await css_file.write(css_content)
-            logger.info(f"CSS saved to: {css_file_path}")
+        has_css = bool(css_content.strip())
+        writes = []
+        if has_css:
+            writes.append(write_text_file(css_file_path, css_content))
 
             css_link = f'<link rel="stylesheet" href="{sanitized_name}.css">'
-            if '<head>' in html_content:
-                html_content = html_content.replace('<head>', f'<head>\n    {css_link}')
+            before_head, head_tag, after_head = html_content.partition('<head>')
+            if head_tag:
+                html_content = f'{before_head}{head_tag}\n    {css_link}{after_head}'
                 logger.info("CSS link added to HTML head")
             else:
                 # If no head tag, embed CSS directly (less ideal but functional)
@@ -68,8 +89,10 @@ async def save_generated_page(page_name: str, html_content: str, css_content: st
         else:
             logger.info("No CSS content to save")
 
-        async with aiofiles.open(html_file_path, 'w', encoding='utf-8') as html_file:
-            await html_file.write(html_content)
+        writes.append(write_text_file(html_file_path, html_content))
+        await asyncio.gather(*writes)
+        if has_css:
+            logger.info(f"CSS saved to: {css_file_path}")
 
         if html_file_path.exists():
             file_size = html_file_path.stat().st_size
@@ -126,7 +149,7 @@ async def lifespan(app: FastAPI):
     if orchestrator_graph:
         await orchestrator_graph.close_connections()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -137,19 +160,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/generate", response_model=WhitePageResponse)
-async def generate_whitepage(request: WhitePageRequest) -> WhitePageResponse:
-    if not orchestrator_graph:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Orchestrator not initialized"
-        )
-
+async def generate_and_save_page(request: WhitePageRequest) -> WhitePageResponse:
     try:
         start_time = time.time()
         generated_page = await orchestrator_graph.generate_whitepage(request.spec)
         generation_time = time.time() - start_time
 
+    except Exception as e:
+        logger.error(f"Failed to generate page: {e}", exc_info=True)
+        return WhitePageResponse(
+            success=False,
+            error=str(e)
+        )
+
+    return await save_page_response(request, generated_page, generation_time)
+
+async def save_page_response(
+    request: WhitePageRequest,
+    generated_page: Optional[GeneratedWhitePage],
+    generation_time: float
+) -> WhitePageResponse:
+    try:
         if not generated_page:
             raise Exception("Failed to generate page")
 
@@ -176,29 +207,75 @@ async def generate_whitepage(request: WhitePageRequest) -> WhitePageResponse:
             error=str(e)
         )
 
+@app.post("/generate", response_model=WhitePageResponse)
+async def generate_whitepage(request: WhitePageRequest) -> WhitePageResponse:
+    if not orchestrator_graph:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Orchestrator not initialized"
+        )
+
+    return await generate_and_save_page(request)
+
+@app.post("/generate/batch", response_model=List[WhitePageResponse])
+async def generate_whitepages(requests: List[WhitePageRequest]) -> List[WhitePageResponse]:
+    if not orchestrator_graph:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Orchestrator not initialized"
+        )
+
+    # The orchestrator runs the batch with abatch, capped at settings.max_concurrency
+    start_time = time.time()
+    generated_pages = await orchestrator_graph.generate_whitepages([request.spec for request in requests])
+    generation_time = time.time() - start_time
+
+    async def respond(request: WhitePageRequest, generated_page) -> WhitePageResponse:
+        if isinstance(generated_page, Exception):
+            return WhitePageResponse(success=False, error=str(generated_page))
+        return await save_page_response(request, generated_page, generation_time)
+
+    return await asyncio.gather(*(
+        respond(request, generated_page) for request, generated_page in zip(requests, generated_pages)
+    ))
+
 @app.get("/preview/{page_name}", response_class=HTMLResponse)
 async def preview_page(page_name: str):
     sanitized_name = sanitize_filename(page_name)
     html_file_path = GENERATION_DIR / f"{sanitized_name}.html"
 
-    if not html_file_path.exists():
+    try:
+        mtime_ns = html_file_path.stat().st_mtime_ns
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Page '{page_name}' not found"
         )
 
-    async with aiofiles.open(html_file_path, 'r', encoding='utf-8') as file:
-        content = await file.read()
+    cached = _preview_cache.get(sanitized_name)
+    if cached is not None and cached[0] == mtime_ns:
+        _preview_cache.move_to_end(sanitized_name)
+        return HTMLResponse(content=cached[1])
+
+    content = await asyncio.to_thread(html_file_path.read_text, encoding='utf-8')
+    _preview_cache[sanitized_name] = (mtime_ns, content)
+    _preview_cache.move_to_end(sanitized_name)
+    if len(_preview_cache) > PREVIEW_CACHE_SIZE:
+        _preview_cache.popitem(last=False)
 
     return HTMLResponse(content=content)
 
+def list_html_files(directory: Path) -> List[str]:
+    with os.scandir(directory) as entries:
+        return [
+            entry.name for entry in entries
+            if entry.name.endswith(".html") and entry.is_file(follow_symlinks=False)
+        ]
+
 @app.get("/generated-pages")
 async def list_generated_pages():
     ensure_generation_directory()
-    pages = []
-    for file in GENERATION_DIR.iterdir():
-        if file.is_file() and file.suffix == ".html":
-            pages.append(file.name)
+    pages = await asyncio.to_thread(list_html_files, GENERATION_DIR)
     return {"pages": pages}
 
 @app.delete("/generated-pages/{page_name}")
@@ -207,6 +284,8 @@ async def delete_generated_page(page_name: str):
     html_file_path = GENERATION_DIR / f"{sanitized_name}.html"
     css_file_path = GENERATION_DIR / f"{sanitized_name}.css"
 
+    _preview_cache.pop(sanitized_name, None)
+
     try:
         if html_file_path.exists():
             html_file_path.unlink()
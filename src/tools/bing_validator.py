@@ -1,4 +1,4 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from bs4 import BeautifulSoup
 import re
 from src.models.pydantic_models import ValidationResult
@@ -7,6 +7,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_BUY_BUTTON_RE = re.compile(r"add to cart|buy|order|заказать|купить", re.I)
+
 class BingValidator:
     """
     Класс для валидации HTML-страниц на соответствие критериям Bing Ads.
@@ -14,6 +16,9 @@ class BingValidator:
     def __init__(self) -> None:
         self.required_policies = settings.bing_required_policies
         self.forbidden_keywords = settings.bing_forbidden_keywords
+        # Текст страницы сравнивается в нижнем регистре, поэтому ключевые слова приводятся к нему один раз
+        self._required_policies_lower = tuple((policy, policy.lower()) for policy in self.required_policies)
+        self._forbidden_keywords_lower = tuple((keyword, keyword.lower()) for keyword in self.forbidden_keywords)
 
     def validate(self, html: str, spec: Dict[str, Any] = None) -> ValidationResult:
         """
@@ -24,7 +29,7 @@ class BingValidator:
         Returns:
             ValidationResult: Результат валидации, включая ошибки, предупреждения и оценку.
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, 'lxml')
         errors = []
         warnings = []
         score = 1.0 # Начинаем со 100%
@@ -33,14 +38,18 @@ class BingValidator:
         # (например, проверка SSL, которая должна быть на уровне HTTPS)
         # errors.extend(self._check_ssl_requirement()) # Удалено, так как это не может быть проверено здесь
 
-        errors.extend(self._check_required_policies(soup))
+        text_content = soup.get_text()
+        text_lower = text_content.lower()
+
+        errors.extend(self._check_required_policies(text_lower))
 
         if spec:
-            errors.extend(self._check_contact_info(soup, spec))
+            errors.extend(self._check_contact_info(text_content, spec))
 
-        errors.extend(self._check_forbidden_content(soup))
-        errors.extend(self._check_commerce_functionality(soup))
-        warnings.extend(self._check_content_quality(soup))
+        errors.extend(self._check_forbidden_content(text_lower))
+        commerce_errors, img_count = self._check_commerce_functionality(soup)
+        errors.extend(commerce_errors)
+        warnings.extend(self._check_content_quality(text_content, img_count))
 
         # Расчет оценки
         if errors:
@@ -65,25 +74,23 @@ class BingValidator:
     # def _check_ssl_requirement(self) -> List[str]:
     #     return ["SSL certificate is required for HTTPS"]
 
-    def _check_required_policies(self, soup: BeautifulSoup) -> List[str]:
+    def _check_required_policies(self, text_lower: str) -> List[str]:
         """
         Проверяет наличие обязательных политик на странице.
         """
         errors = []
-        text_content = soup.get_text().lower()
 
-        for policy in self.required_policies:
-            if policy not in text_content:
+        for policy, policy_lower in self._required_policies_lower:
+            if policy_lower not in text_lower:
                 errors.append(f"Missing required policy: {policy}")
 
         return errors
 
-    def _check_contact_info(self, soup: BeautifulSoup, spec: Dict[str, Any]) -> List[str]:
+    def _check_contact_info(self, text_content: str, spec: Dict[str, Any]) -> List[str]:
         """
         Проверяет наличие и корректность контактной информации на странице.
         """
         errors = []
-        text_content = soup.get_text()
 
         contact_phone = spec.get("contact_phone", "")
         contact_email = spec.get("contact_email", "")
@@ -100,46 +107,56 @@ class BingValidator:
 
         return errors
 
-    def _check_forbidden_content(self, soup: BeautifulSoup) -> List[str]:
+    def _check_forbidden_content(self, text_lower: str) -> List[str]:
         """
         Проверяет наличие запрещенных ключевых слов на странице.
         """
         errors = []
-        text_content = soup.get_text().lower()
 
-        for keyword in self.forbidden_keywords:
-            if keyword in text_content:
+        for keyword, keyword_lower in self._forbidden_keywords_lower:
+            if keyword_lower in text_lower:
                 errors.append(f"Forbidden content detected: {keyword}")
 
         return errors
 
-    def _check_commerce_functionality(self, soup: BeautifulSoup) -> List[str]:
+    def _check_commerce_functionality(self, soup: BeautifulSoup) -> Tuple[List[str], int]:
         """
         Проверяет наличие базовой функциональности электронной коммерции (кнопки, формы).
+        Заодно считает изображения, чтобы не обходить документ повторно.
         """
         errors = []
+        has_buy_button = False
+        has_form = False
+        img_count = 0
+
+        for tag in soup.find_all(["button", "form", "img"]):
+            if tag.name == "img":
+                img_count += 1
+            elif tag.name == "form":
+                has_form = True
+            elif not has_buy_button and tag.string and _BUY_BUTTON_RE.search(tag.string):
+                has_buy_button = True
 
         # Проверка наличия кнопок "добавить в корзину" / "купить"
-        if not soup.find_all("button", string=re.compile(r"add to cart|buy|order|заказать|купить", re.I)):
+        if not has_buy_button:
             errors.append("E-commerce functionality (cart/buy buttons) is required")
 
         # Проверка наличия форм (контактных, заказа и т.д.)
-        if not soup.find("form"):
+        if not has_form:
             errors.append("Contact/order forms are required")
 
-        return errors
+        return errors, img_count
 
-    def _check_content_quality(self, soup: BeautifulSoup) -> List[str]:
+    def _check_content_quality(self, text_content: str, img_count: int) -> List[str]:
         """
         Проверяет качество контента страницы (длина текста, количество изображений).
         """
         warnings = []
-        text_content = soup.get_text()
 
         if len(text_content) < 500:
             warnings.append("Page content is too short")
 
-        if len(soup.find_all("img")) < 3:
+        if img_count < 3:
             warnings.append("Consider adding more product images")
 
         return warnings
\ No newline at end of file
@@ -1,13 +1,14 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 import logging
 import asyncio
 from pathlib import Path
 from uuid import uuid4
+import base64
+import zlib
 
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.exceptions import UnexpectedResponse
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, PayloadSchemaType
 
 from src.models.pydantic_models import FullPageTemplate
 from src.config.settings import settings
@@ -15,17 +16,21 @@ from src.config.settings import settings
 logger = logging.getLogger(__name__)
 
 class AsyncQdrantManager:
-    def __init__(self, host: str = "localhost", port: int = 6333, api_key: Optional[str] = None, timeout: float = 30.0, prefer_grpc: bool = False, max_retries: int = 3, retry_delay: float = 2.0, collection_name: str = "templates", embedding_dim: int = 1536):
+    PAYLOAD_COMPRESSION = "zlib"
+
+    def __init__(self, host: str = "localhost", port: int = 6333, api_key: Optional[str] = None, timeout: float = 30.0, prefer_grpc: bool = False, grpc_port: int = 6334, max_retries: int = 3, retry_delay: float = 2.0, collection_name: str = "templates", embedding_dim: int = 1536):
         self.host = host
         self.port = port
         self.api_key = api_key
         self.timeout = timeout
         self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
         self.client = None
+        self._ensured_collections: Set[str] = set()
 
     async def get_client(self) -> AsyncQdrantClient:
         if self.client is None:
@@ -34,6 +39,7 @@ class AsyncQdrantManager:
                 port=self.port,
                 api_key=self.api_key,
                 timeout=self.timeout,
+                grpc_port=self.grpc_port,
                 prefer_grpc=self.prefer_grpc
             )
         return self.client
@@ -44,10 +50,11 @@ class AsyncQdrantManager:
             self.client = None
 
     async def _ensure_collection(self, client: AsyncQdrantClient, collection_name: str) -> None:
-        try:
-            collection_info = await client.get_collection(collection_name)
-            logger.info(f"Collection '{collection_name}' already exists: {collection_info}")
-        except UnexpectedResponse:
+        if collection_name in self._ensured_collections:
+            return
+        if await client.collection_exists(collection_name):
+            logger.info(f"Collection '{collection_name}' already exists")
+        else:
             logger.info(f"Creating collection '{collection_name}'")
             await client.create_collection(
                 collection_name=collection_name,
@@ -56,6 +63,12 @@ class AsyncQdrantManager:
                     distance=Distance.COSINE
                 )
             )
+            await client.create_payload_index(
+                collection_name=collection_name,
+                field_name="name",
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+        self._ensured_collections.add(collection_name)
 
     async def health_check(self) -> bool:
         try:
@@ -82,14 +95,7 @@ class AsyncQdrantManager:
             
             results = []
             for result in search_results:
-                payload = result.payload
-                template = FullPageTemplate(
-                    name=payload["name"],
-                    html=payload["html"],
-                    css=payload["css"],
-                    description=payload["description"],
-                    tags=payload["tags"]
-                )
+                template = self._template_from_payload(result.payload)
                 results.append((template, result.score))
             
             logger.info(f"Found {len(results)} templates with similarity search")
@@ -106,40 +112,100 @@ class AsyncQdrantManager:
             collection_name = collection_name or self.collection_name
             await self._ensure_collection(client, collection_name)
 
-            point_id = str(uuid4())
-
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    "name": template.name,
-                    "html": template.html,
-                    "css": template.css,
-                    "description": template.description,
-                    "tags": template.tags
-                }
-            )
+            point = self._template_point(template, embedding)
 
             await client.upsert(
                 collection_name=collection_name,
                 points=[point]
             )
-            logger.info(f"Template '{template.name}' added to Qdrant with ID: {point_id}")
+            logger.info(f"Template '{template.name}' added to Qdrant with ID: {point.id}")
             return True
         except Exception as e:
             logger.error(f"Failed to add template '{template.name}' to Qdrant: {e}")
             return False
 
+    async def bulk_add_templates(self, templates: List[Tuple[FullPageTemplate, List[float]]], collection_name: Optional[str] = None) -> bool:
+        """Adds several templates to the Qdrant collection in a single upsert."""
+        if not templates:
+            return True
+        try:
+            client = await self.get_client()
+            collection_name = collection_name or self.collection_name
+            await self._ensure_collection(client, collection_name)
+
+            await client.upsert(
+                collection_name=collection_name,
+                points=[self._template_point(template, embedding) for template, embedding in templates]
+            )
+            logger.info(f"Added {len(templates)} templates to Qdrant")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add {len(templates)} templates to Qdrant: {e}")
+            return False
+
+    @classmethod
+    def _template_point(cls, template: FullPageTemplate, embedding: List[float]) -> PointStruct:
+        return PointStruct(
+            id=str(uuid4()),
+            vector=embedding,
+            payload={
+                "name": template.name,
+                "html": cls._compress_text(template.html),
+                "css": cls._compress_text(template.css),
+                "description": template.description,
+                "tags": template.tags,
+                "compression": cls.PAYLOAD_COMPRESSION
+            }
+        )
+
+    @classmethod
+    def _template_from_payload(cls, payload: Dict[str, Any]) -> FullPageTemplate:
+        # Points written before compression was introduced carry plain strings
+        compressed = payload.get("compression") == cls.PAYLOAD_COMPRESSION
+        return FullPageTemplate(
+            name=payload["name"],
+            html=cls._decompress_text(payload["html"]) if compressed else payload["html"],
+            css=cls._decompress_text(payload["css"]) if compressed else payload["css"],
+            description=payload["description"],
+            tags=payload["tags"]
+        )
+
+    @staticmethod
+    def _compress_text(text: str) -> str:
+        return base64.b64encode(zlib.compress(text.encode('utf-8'), 9)).decode('ascii')
+
+    @staticmethod
+    def _decompress_text(data: str) -> str:
+        return zlib.decompress(base64.b64decode(data)).decode('utf-8')
+
+    async def list_template_names(self, collection_name: Optional[str] = None) -> Set[str]:
+        """Returns the names of all templates stored in the Qdrant collection."""
+        client = await self.get_client()
+        collection_name = collection_name or self.collection_name
+
+        names: Set[str] = set()
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=["name"],
+                with_vectors=False
+            )
+            names.update(point.payload["name"] for point in points if point.payload and "name" in point.payload)
+            if offset is None:
+                return names
+
     async def get_template(self, template_name: str, collection_name: Optional[str] = None) -> Optional[FullPageTemplate]:
         """Retrieves a template from the Qdrant collection by name."""
         try:
             client = await self.get_client()
             collection_name = collection_name or self.collection_name
 
-            search_result = await client.search(
+            points, _ = await client.scroll(
                 collection_name=collection_name,
-                query_vector=[0.0] * self.embedding_dim,
-                query_filter=Filter(
+                scroll_filter=Filter(
                     must=[
                         FieldCondition(
                             key="name",
@@ -147,18 +213,13 @@ class AsyncQdrantManager:
                         )
                     ]
                 ),
-                limit=1
+                limit=1,
+                with_payload=True,
+                with_vectors=False
             )
 
-            if search_result:
-                payload = search_result[0].payload
-                return FullPageTemplate(
-                    name=payload["name"],
-                    html=payload["html"],
-                    css=payload["css"],
-                    description=payload["description"],
-                    tags=payload["tags"]
-                )
+            if points:
+                return self._template_from_payload(points[0].payload)
             else:
                 logger.info(f"Template '{template_name}' not found in Qdrant")
                 return None
@@ -1,15 +1,26 @@
 import logging
 import sys
+from functools import lru_cache
 from rich.logging import RichHandler
 from rich.console import Console
 from rich.theme import Theme
 from src.config.settings import settings # Импортируем настройки
 
-def get_logger(name: str) -> logging.Logger:
+PLAIN_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+@lru_cache(maxsize=1)
+def _get_handler(log_level: int) -> logging.Handler:
     """
-    Возвращает настроенный логгер с RichHandler.
-    Уровень логирования устанавливается в зависимости от settings.debug.
+    Создает общий для всех логгеров обработчик.
+    RichHandler используется только в режиме отладки при выводе в терминал,
+    в остальных случаях - простой StreamHandler без затрат на рендеринг.
     """
+    if not (settings.debug and sys.stderr.isatty()):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(PLAIN_LOG_FORMAT))
+        handler.setLevel(log_level)
+        return handler
+
     console = Console(
         log_time=True,
         log_time_format='%H:%M:%S-%f',
@@ -20,9 +31,7 @@ def get_logger(name: str) -> logging.Logger:
         })
     )
 
-    log_level = logging.DEBUG if settings.debug else logging.INFO
-
-    handler = RichHandler(
+    return RichHandler(
         show_time=True,
         omit_repeated_times=False,
         show_level=True,
@@ -34,9 +43,16 @@ def get_logger(name: str) -> logging.Logger:
         console=console
     )
 
+def get_logger(name: str) -> logging.Logger:
+    """
+    Возвращает настроенный логгер с общим обработчиком.
+    Уровень логирования устанавливается в зависимости от settings.debug.
+    """
+    log_level = logging.DEBUG if settings.debug else logging.INFO
+
     logger = logging.getLogger(name)
     if not logger.handlers:
-        logger.addHandler(handler)
+        logger.addHandler(_get_handler(log_level))
         logger.setLevel(log_level) # Устанавливаем уровень для логгера
 
     return logger
\ No newline at end of file
@@ -1,12 +1,61 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Sequence, Set, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
 import re
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from lxml import etree
+import dns.asyncresolver
+import dns.exception
 import dns.resolver
 import socket
 from email_validator import validate_email, EmailNotValidError
 from src.config.settings import settings # Импортируем настройки
 
+# lxml сам достраивает html/head/body, поэтому их наличие проверяется по исходному тексту
+_IMPLIED_STRUCTURE_TAGS = frozenset({'html', 'head', 'body'})
+_STRUCTURE_TAG_RE = re.compile(r'<(html|head|body)[\s>/]', re.IGNORECASE)
+
+# Разбор всегда идет из UTF-8 байтов: так не мешают XML-декларации с encoding в строке
+_HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+
+_PHONE_RE = re.compile(r'^\+?1?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})$')
+_PHONE_STRIP_TABLE = str.maketrans('', '', ' -()')
+_HAS_DIGIT_RE = re.compile(r'\d')
+_HAS_LETTER_RE = re.compile(r'[a-zA-Z]')
+_FORBIDDEN_BRAND_WORDS = ('test', 'example', 'sample', 'demo')
+_PLAIN_HTTP_URL_RE = re.compile(r"https?://[\w.:@%!$&'()*+,;=~-]+(?=[/?#]|$)", re.ASCII)
+_DANGEROUS_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'javascript:',
+    r'onload=',
+    r'onerror=',
+    r'eval\(',
+    r'document\.cookie',
+    r'window\.location'
+))
+# Общий шаблон для быстрой проверки чистых значений; по отдельным шаблонам проходим только при совпадении
+_DANGEROUS_RE = re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in _DANGEROUS_PATTERNS), re.IGNORECASE)
+_SCRIPT_OPEN_RE = re.compile(r'<script', re.IGNORECASE)
+_SCRIPT_CLOSE_RE = re.compile(r'</script>', re.IGNORECASE)
+
+def _contains_script_block(value: str) -> bool:
+    """
+    Линейный эквивалент поиска r'<script.*?>.*?</script>' (без DOTALL).
+    Сам regex на строках с множеством '<script' и '>' работает за O(n^3).
+    Если от первого '<script' в строке не найдено '>' и затем '</script>',
+    то от последующих '<script' той же строки их тоже нет - переходим к следующей строке.
+    """
+    pos = 0
+    while (match := _SCRIPT_OPEN_RE.search(value, pos)) is not None:
+        line_end = value.find('\n', match.end())
+        if line_end == -1:
+            line_end = len(value)
+        tag_end = value.find('>', match.end(), line_end)
+        if tag_end != -1 and _SCRIPT_CLOSE_RE.search(value, tag_end + 1, line_end):
+            return True
+        pos = line_end + 1
+    return False
+
 class DataValidator:
     """
     Набор статических методов для валидации различных типов данных.
@@ -22,14 +71,57 @@ class DataValidator:
         except EmailNotValidError as e:
             return False, str(e)
 
+    @staticmethod
+    async def validate_email_batch_async(emails: Sequence[str]) -> List[Tuple[bool, str]]:
+        """
+        Валидирует несколько email-адресов: синтаксис проверяется локально,
+        а DNS-запросы выполняются параллельно, по одному на уникальный домен.
+        """
+        if not emails:
+            return []
+
+        syntax_results = []
+        for email in emails:
+            try:
+                syntax_results.append((True, validate_email(email, check_deliverability=False)))
+            except EmailNotValidError as e:
+                syntax_results.append((False, str(e)))
+
+        domains = list({validated.ascii_domain for is_valid, validated in syntax_results if is_valid})
+        resolver = dns.asyncresolver.Resolver()
+        deliverable = dict(zip(domains, await asyncio.gather(
+            *(DataValidator._domain_accepts_email(resolver, domain) for domain in domains)
+        )))
+
+        results = []
+        for is_valid, validated in syntax_results:
+            if not is_valid:
+                results.append((False, validated))
+            elif not deliverable[validated.ascii_domain]:
+                results.append((False, f"The domain name {validated.domain} does not accept email."))
+            else:
+                results.append((True, validated.email))
+        return results
+
+    @staticmethod
+    async def _domain_accepts_email(resolver: dns.asyncresolver.Resolver, domain: str) -> bool:
+        """
+        Проверяет наличие MX-записи домена, при ее отсутствии - A/AAAA-записи.
+        """
+        for record_type in ('MX', 'A', 'AAAA'):
+            try:
+                await resolver.resolve(domain, record_type)
+                return True
+            except dns.exception.DNSException:
+                continue
+        return False
+
     @staticmethod
     def validate_phone_number(phone: str) -> Tuple[bool, str]:
         """
         Валидирует формат телефонного номера (простой паттерн для США).
         """
-        phone_pattern = re.compile(r'^\+?1?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})$')
-
-        if phone_pattern.match(phone.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')):
+        if _PHONE_RE.match(phone.translate(_PHONE_STRIP_TABLE)):
             return True, phone
         else:
             return False, "Invalid phone number format"
@@ -42,8 +134,8 @@ class DataValidator:
         if len(address) < 10:
             return False, "Address too short"
 
-        has_numbers = bool(re.search(r'\d', address))
-        has_letters = bool(re.search(r'[a-zA-Z]', address))
+        has_numbers = bool(_HAS_DIGIT_RE.search(address))
+        has_letters = bool(_HAS_LETTER_RE.search(address))
 
         if not (has_numbers and has_letters):
             return False, "Address must contain both numbers and letters"
@@ -61,8 +153,8 @@ class DataValidator:
         if len(brand_name) > 50:
             return False, "Brand name too long"
 
-        forbidden_words = ['test', 'example', 'sample', 'demo']
-        if any(word in brand_name.lower() for word in forbidden_words):
+        brand_name_lower = brand_name.lower()
+        if any(word in brand_name_lower for word in _FORBIDDEN_BRAND_WORDS):
             return False, "Brand name contains forbidden words"
 
         return True, brand_name
@@ -84,10 +176,30 @@ class HTMLValidator:
     """
     Класс для валидации структуры и содержимого HTML.
     """
+    PARSE_CACHE_SIZE = 64
+
+    _CHARSET_META_XPATH = etree.XPath('boolean(//meta[@charset != ""])')
+    _VIEWPORT_META_XPATH = etree.XPath('boolean(//meta[@name = "viewport"])')
+    _FORMS_XPATH = etree.XPath('//form')
+    _FORM_HAS_INPUTS_XPATH = etree.XPath('boolean(.//input | .//textarea)')
+    _LINK_HREFS_XPATH = etree.XPath('//a/@href[. != ""]', smart_strings=False)
+
     def __init__(self):
         self.required_tags = settings.html_required_tags
         self.required_meta_tags = settings.html_required_meta_tags
         self.forbidden_tags = settings.html_forbidden_tags
+        self.forbidden_css_properties = settings.css_forbidden_properties
+        # Одна альтернатива вместо отдельного поиска по каждому свойству; длинные варианты идут первыми
+        self._forbidden_css_re = re.compile('|'.join(
+            re.escape(prop) for prop in sorted(set(self.forbidden_css_properties), key=len, reverse=True)
+        ))
+        # Наличие каждого проверяемого тега - отдельное скомпилированное XPath-выражение
+        self._tag_xpaths = {
+            tag: etree.XPath(f'boolean(//{tag})')
+            for tag in sorted({*self.required_tags, *self.forbidden_tags} - _IMPLIED_STRUCTURE_TAGS)
+        }
+        # Результаты разбора по хешу HTML: повторная валидация той же страницы не строит дерево заново
+        self._parse_cache: OrderedDict[bytes, Tuple[Dict[str, Any], Set[str]]] = OrderedDict()
 
     def validate_html_structure(self, html: str) -> Tuple[bool, List[str]]:
         """
@@ -95,16 +207,29 @@ class HTMLValidator:
         """
         errors = []
 
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-        except Exception as e:
-            return False, [f"Invalid HTML structure: {str(e)}"]
-
-        errors.extend(self._check_required_tags(soup))
-        errors.extend(self._check_meta_tags(soup))
-        errors.extend(self._check_forbidden_content(soup))
-        errors.extend(self._check_forms(soup))
-        errors.extend(self._check_links(soup))
+        html_bytes = html.encode('utf-8')
+        cache_key = hashlib.blake2b(html_bytes, digest_size=16).digest()
+        cached = self._parse_cache.get(cache_key)
+        if cached is not None:
+            self._parse_cache.move_to_end(cache_key)
+            collected, explicit_structure_tags = cached
+        else:
+            try:
+                root = etree.fromstring(html_bytes, _HTML_PARSER)
+            except Exception as e:
+                return False, [f"Invalid HTML structure: {str(e)}"]
+
+            explicit_structure_tags = {tag.lower() for tag in _STRUCTURE_TAG_RE.findall(html)}
+            collected = self._collect(root)
+            self._parse_cache[cache_key] = (collected, explicit_structure_tags)
+            if len(self._parse_cache) > self.PARSE_CACHE_SIZE:
+                self._parse_cache.popitem(last=False)
+
+        errors.extend(self._check_required_tags(collected, explicit_structure_tags))
+        errors.extend(self._check_meta_tags(collected))
+        errors.extend(self._check_forbidden_content(collected))
+        errors.extend(self._check_forms(collected))
+        errors.extend(self._check_links(collected))
 
         return len(errors) == 0, errors
 
@@ -118,80 +243,101 @@ class HTMLValidator:
             errors.append("No CSS content provided")
             return False, errors
 
-        for prop in settings.css_forbidden_properties:
-            if prop in css:
+        found_props = {match.group() for match in self._forbidden_css_re.finditer(css)}
+        for prop in self.forbidden_css_properties:
+            if prop in found_props:
                 errors.append(f"Forbidden CSS property: {prop}")
 
         return len(errors) == 0, errors
 
-    def _check_required_tags(self, soup: BeautifulSoup) -> List[str]:
+    def _collect(self, root: Optional[etree._Element]) -> Dict[str, Any]:
+        """
+        Собирает данные, которые нужны проверкам _check_*; все обходы дерева выполняет libxml2.
+        """
+        if root is None:
+            # Пустой документ (или только комментарии): ни одного элемента
+            return {'tags': set(), 'metas': set(), 'forms': [], 'hrefs': []}
+
+        metas = set()
+        if self._CHARSET_META_XPATH(root):
+            metas.add('charset')
+        if self._VIEWPORT_META_XPATH(root):
+            metas.add('viewport')
+
+        return {
+            'tags': {tag for tag, has_tag in self._tag_xpaths.items() if has_tag(root)},
+            'metas': metas,
+            'forms': [
+                {
+                    'action': form.get('action'),
+                    'method': form.get('method'),
+                    'has_inputs': self._FORM_HAS_INPUTS_XPATH(form)
+                }
+                for form in self._FORMS_XPATH(root)
+            ],
+            'hrefs': self._LINK_HREFS_XPATH(root)
+        }
+
+    def _check_required_tags(self, collected: Dict[str, Any], explicit_structure_tags: Set[str]) -> List[str]:
         """
         Проверяет наличие обязательных HTML-тегов.
         """
         errors = []
         for tag in self.required_tags:
-            if not soup.find(tag):
+            if tag in _IMPLIED_STRUCTURE_TAGS:
+                found = tag in explicit_structure_tags
+            else:
+                found = tag in collected['tags']
+            if not found:
                 errors.append(f"Missing required tag: {tag}")
         return errors
 
-    def _check_meta_tags(self, soup: BeautifulSoup) -> List[str]:
+    def _check_meta_tags(self, collected: Dict[str, Any]) -> List[str]:
         """
         Проверяет наличие обязательных мета-тегов.
         """
         errors = []
-        meta_tags = soup.find_all('meta')
-        found_meta = set()
-
-        for meta in meta_tags:
-            if meta.get('charset'):
-                found_meta.add('charset')
-            if meta.get('name') == 'viewport':
-                found_meta.add('viewport')
-
         for required_meta in self.required_meta_tags:
-            if required_meta not in found_meta:
+            if required_meta not in collected['metas']:
                 errors.append(f"Missing required meta tag: {required_meta}")
         return errors
 
-    def _check_forbidden_content(self, soup: BeautifulSoup) -> List[str]:
+    def _check_forbidden_content(self, collected: Dict[str, Any]) -> List[str]:
         """
         Проверяет наличие запрещенных HTML-тегов.
         """
         errors = []
         for tag in self.forbidden_tags:
-            if soup.find(tag):
+            if tag in collected['tags']:
                 errors.append(f"Forbidden tag found: {tag}")
         return errors
 
-    def _check_forms(self, soup: BeautifulSoup) -> List[str]:
+    def _check_forms(self, collected: Dict[str, Any]) -> List[str]:
         """
         Проверяет наличие форм и их базовых атрибутов.
         """
         errors = []
-        forms = soup.find_all('form')
+        forms = collected['forms']
         if not forms:
             errors.append("No forms found - required for e-commerce")
             return errors
 
         for form in forms:
-            if not form.get('action'):
+            if not form['action']:
                 errors.append("Form missing action attribute")
-            if not form.get('method'):
+            if not form['method']:
                 errors.append("Form missing method attribute")
-            required_inputs = form.find_all(['input', 'textarea'])
-            if not required_inputs:
+            if not form['has_inputs']:
                 errors.append("Form has no input fields")
         return errors
 
-    def _check_links(self, soup: BeautifulSoup) -> List[str]:
+    def _check_links(self, collected: Dict[str, Any]) -> List[str]:
         """
         Проверяет валидность внешних URL-адресов в ссылках.
         """
         errors = []
-        links = soup.find_all('a')
-        for link in links:
-            href = link.get('href')
-            if href and href.startswith('http'):
+        for href in collected['hrefs']:
+            if href.startswith('http'):
                 if not self._is_valid_url(href):
                     errors.append(f"Invalid external URL: {href}")
         return errors
@@ -200,6 +346,9 @@ class HTMLValidator:
         """
         Проверяет, является ли URL валидным.
         """
+        # Обычные http(s)-ссылки с ASCII-хостом принимаются без построения ParseResult
+        if _PLAIN_HTTP_URL_RE.match(url):
+            return True
         try:
             result = urlparse(url)
             return all([result.scheme, result.netloc])
@@ -216,19 +365,12 @@ class SecurityValidator:
         Проверяет входные данные на наличие потенциально опасного контента (XSS).
         """
         errors = []
-        dangerous_patterns = [
-            r'<script.*?>.*?</script>',
-            r'javascript:',
-            r'onload=',
-            r'onerror=',
-            r'eval\(',
-            r'document\.cookie',
-            r'window\.location'
-        ]
-
         for key, value in data.items():
-            if isinstance(value, str):
-                for pattern in dangerous_patterns:
-                    if re.search(pattern, value, re.IGNORECASE):
-                        errors.append(f"Potentially dangerous content in {key}")
+            if not isinstance(value, str):
+                continue
+            # Одно сообщение на каждый совпавший шаблон, как и раньше
+            matches = int(_contains_script_block(value))
+            if _DANGEROUS_RE.search(value):
+                matches += sum(1 for pattern in _DANGEROUS_PATTERNS if pattern.search(value))
+            errors.extend([f"Potentially dangerous content in {key}"] * matches)
         return len(errors) == 0, errors
\ No newline at end of file